@@ -4,60 +4,252 @@ AI-powered locality analysis using LangGraph and OpenStreetMap.
 
 Restructured for optimal user experience with clear information hierarchy.
 """
+from __future__ import annotations
+
+import asyncio
 import streamlit as st
 import time
 import math
-from pathlib import Path
-import sys
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from string import Template
+from typing import TYPE_CHECKING
+
+from config.config import get_settings
+
+# Heavy imports (pydeck, LangGraph + the geospatial stack behind it) are
+# deferred to first use so the input form paints without waiting on them.
+if TYPE_CHECKING:
+    import pydeck as pdk
+    from src.graph.state import LocalityState
+
+# CARTO Positron vector basemap (no token needed). Tiles and style are served
+# from CARTO's CDN with long-lived Cache-Control headers, so the browser keeps
+# them warm across reruns and sessions.
+BASEMAP_STYLE = "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json"
+
+# Static HTML blocks, built once and rendered with st.html (no markdown pass)
+_HERO_HTML = """
+<div style='text-align: center; padding: 20px 0;'>
+    <h1 style='margin-bottom: 10px;'>🏘️ Locality Lens</h1>
+    <p style='color: #666; font-size: 1.1em;'>AI-Powered Location Analysis</p>
+</div>
+"""
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent))
+_SUMMARY_HEADER_HTML = """
+<div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+            padding: 30px; border-radius: 10px; color: white; margin-bottom: 20px;'>
+    <h2 style='color: white; margin-bottom: 15px;'>🤖 AI Analysis Summary</h2>
+</div>
+"""
+
+_SUMMARY_CARD_TEMPLATE = Template("""
+<div style='background: #f8f9fa; padding: 20px; border-radius: 8px; 
+            border-left: 4px solid #667eea; margin-bottom: 30px;'>
+    <p style='font-size: 1.1em; line-height: 1.8; color: #333;'>
+    $body
+    </p>
+</div>
+""")
+
+_CURSOR_HTML = "<span style='opacity: 0.5;'>|</span>"
+
+# Progress steps shown in run_analysis, with weights for progress calculation
+STEP_DEFINITIONS = {
+    "validate": {"name": "Validating Input", "icon": "🔍", "weight": 0.03},
+    "intent": {"name": "Extracting Intent & Selecting Metrics", "icon": "🎯", "weight": 0.12},
+    "geocode": {"name": "Geocoding Location", "icon": "🌍", "weight": 0.08},
+    "fetch": {"name": "Fetching Location Data", "icon": "🗺️", "weight": 0.55},
+    "calculate": {"name": "Calculating Statistics", "icon": "📊", "weight": 0.10},
+    "summarize": {"name": "Generating AI Summary", "icon": "🤖", "weight": 0.12},
+}
+
+# Checklist line for each step in each status
+STEP_LINES = {
+    step_key: {
+        "pending": f"⏸️ {step_info['icon']} {step_info['name']}",
+        "running": f"⏳ **{step_info['icon']} {step_info['name']}** *(in progress...)*",
+        "completed": f"✅ **{step_info['icon']} {step_info['name']}**",
+    }
+    for step_key, step_info in STEP_DEFINITIONS.items()
+}
 
-# Map visualization imports
-import folium
-from streamlit_folium import st_folium
+# Graph node -> progress step shown in run_analysis. locate_and_fetch reports
+# its geocode half on the custom stream as "geocode_location"
+NODE_STEPS = {
+    "validate_input": "validate",
+    "extract_intent_and_select_metrics": "intent",
+    "geocode_location": "geocode",
+    "locate_and_fetch": "fetch",
+    "calculate_statistics": "calculate",
+    "generate_summary": "summarize",
+}
 
-from config.config import APP_NAME, DEFAULT_LOCATION
-from src.graph.graph import compile_graph
-from src.graph.state import LocalityState
+# Progress step -> steps that must finish before it starts (mirrors the
+# graph's fan-out after validation and fan-in at calculate_statistics; the
+# fetch follows geocoding inside the same node, independent of intent)
+STEP_PREREQS = {
+    "intent": ("validate",),
+    "geocode": ("validate",),
+    "fetch": ("geocode",),
+    "calculate": ("intent", "fetch"),
+    "summarize": ("calculate",),
+}
+
+# Minimum seconds between progress UI updates while the graph streams
+UI_UPDATE_INTERVAL_S = 0.1
+
+# Minimum new characters (~10 words) between live summary re-renders
+SUMMARY_RENDER_CHARS = 60
+
+# Recent analyses kept per browser session, in front of the shared cache
+SESSION_CACHE_SIZE = 8
+
+# Shared (cross-session) analysis cache: entries expire after 24 hours and
+# at most this many are kept, to bound memory
+ANALYSIS_CACHE_TTL_S = 24 * 60 * 60
+ANALYSIS_CACHE_SIZE = 512
 
 # ============================================================================
 # Cached Resources
 # ============================================================================
 
-@st.cache_resource
 def get_graph():
-    """Initialize and cache the LangGraph workflow."""
+    """
+    Get the LangGraph workflow.
+    
+    The compiled graph is a process-wide singleton held by src.graph.graph,
+    which (unlike this script) is not re-executed on every Streamlit rerun.
+    """
     try:
-        return compile_graph()
+        from src.graph.graph import get_graph as get_compiled_graph
+        return get_compiled_graph()
     except Exception as e:
         st.error(f"Failed to initialize graph: {e}")
         return None
 
+
+@st.cache_resource
+def analysis_store() -> dict:
+    """
+    Per-locality analysis cache shared by every session in this process.
+    
+    Maps (location_key, profile) -> (stored_at, result) in LRU order; use
+    the get/put/clear helpers below, which hold the lock.
+    """
+    return {"lock": threading.Lock(), "entries": OrderedDict()}
+
+
+def get_shared_analysis(key: tuple):
+    """Return a shared cached result younger than ANALYSIS_CACHE_TTL_S, or None."""
+    store = analysis_store()
+    with store["lock"]:
+        entry = store["entries"].get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.time() - stored_at > ANALYSIS_CACHE_TTL_S:
+            del store["entries"][key]
+            return None
+        store["entries"].move_to_end(key)
+        return result
+
+
+def put_shared_analysis(key: tuple, result: dict):
+    """Store (or replace) a shared result, evicting the least recently used."""
+    store = analysis_store()
+    with store["lock"]:
+        store["entries"][key] = (time.time(), result)
+        store["entries"].move_to_end(key)
+        while len(store["entries"]) > ANALYSIS_CACHE_SIZE:
+            store["entries"].popitem(last=False)
+
+
+def clear_shared_analyses():
+    """Drop every shared cached result."""
+    store = analysis_store()
+    with store["lock"]:
+        store["entries"].clear()
+
+
+def normalize_location_key(location_input: str) -> str:
+    """Normalize a location query for use as a cache key."""
+    return " ".join(location_input.strip().lower().split())
+
+
+def session_cache() -> OrderedDict:
+    """
+    Per-session LRU of recent analyses, keyed on (location_key, profile).
+    
+    Hits skip the lock of the shared cache; both hand back the stored dict
+    as-is, without copying the large osm_data payload.
+    """
+    return st.session_state.setdefault("_analysis_cache", OrderedDict())
+
+
+def remember_analysis(key: tuple, result: dict):
+    """Store a result in the session LRU, evicting the oldest entries."""
+    cache = session_cache()
+    cache[key] = result
+    cache.move_to_end(key)
+    while len(cache) > SESSION_CACHE_SIZE:
+        cache.popitem(last=False)
+
 # ============================================================================
 # UI Components - Restructured for Better UX
 # ============================================================================
 
+def queue_query():
+    """
+    Submit callback: stash the query and clear the input.
+    
+    Runs before the rerun it triggers, so the cleared input and the status
+    container paint on the very next frame, ahead of any backend work.
+    """
+    profile_type = st.session_state.get("profile_type")
+    if profile_type == "Custom":
+        user_profile = st.session_state.get("custom_profile") or None
+    else:
+        user_profile = profile_type or None
+    
+    st.session_state.pending_query = (st.session_state.query_input, user_profile)
+    st.session_state.query_input = ""
+
+
+def reanalyze_last_query():
+    """Re-analyze callback: queue the last query again, bypassing the caches."""
+    st.session_state.pending_query = st.session_state.last_query
+    st.session_state.force_refresh = True
+
+
+@st.fragment
 def render_input_form():
-    """Render a clean, focused input form."""
+    """
+    Render a clean, focused input form.
+    
+    Runs as a fragment: changing the location or profile reruns only the
+    form, leaving the results below untouched. A submit escalates to a full
+    app rerun, which is what runs the analysis.
+    """
     # Hero section
-    st.markdown("""
-    <div style='text-align: center; padding: 20px 0;'>
-        <h1 style='margin-bottom: 10px;'>🏘️ Locality Lens</h1>
-        <p style='color: #666; font-size: 1.1em;'>AI-Powered Location Analysis</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_HERO_HTML)
     
     st.markdown("---")
     
+    if "query_input" not in st.session_state:
+        st.session_state.query_input = get_settings().default_location
+    
     # Input form in a container for better focus
     with st.container():
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            location_input = st.text_input(
+            st.text_input(
                 "📍 Enter Location",
-                value=DEFAULT_LOCATION,
+                key="query_input",
                 help="Enter an address (e.g., 'Indiranagar, Bangalore') or coordinates (e.g., '12.9784, 77.6408')",
                 placeholder="Indiranagar, Bangalore or 12.9784, 77.6408",
                 label_visibility="visible"
@@ -66,6 +258,7 @@ def render_input_form():
         with col2:
             profile_type = st.selectbox(
                 "👤 Your Profile",
+                key="profile_type",
                 options=["", "Bachelor/Young Professional", "Family with Kids", "Student", 
                         "Senior Citizen", "Working Professional", "Custom"],
                 help="Select your profile for personalized insights",
@@ -73,21 +266,26 @@ def render_input_form():
             )
         
         # Custom profile input (shown when "Custom" is selected)
-        custom_profile = None
         if profile_type == "Custom":
-            custom_profile = st.text_area(
+            st.text_area(
                 "Describe Your Needs",
+                key="custom_profile",
                 placeholder="e.g., I'm a fitness enthusiast who loves parks and gyms, need good connectivity",
                 help="Describe your lifestyle, priorities, and concerns",
                 height=80
             )
-            user_profile = custom_profile if custom_profile else None
-        else:
-            user_profile = profile_type if profile_type else None
         
-        submit_button = st.button("🔍 Analyze Location", type="primary", use_container_width=True)
+        st.button(
+            "🔍 Analyze Location",
+            type="primary",
+            use_container_width=True,
+            on_click=queue_query
+        )
     
-    return location_input, user_profile, submit_button
+    # A click inside a fragment only reruns the fragment; main() pops the
+    # query before drawing the form, so this only fires on that fragment run
+    if "pending_query" in st.session_state:
+        st.rerun()
 
 def create_initial_state(location_input: str, user_profile: str = None) -> LocalityState:
     """Create initial state for the graph."""
@@ -111,164 +309,170 @@ def create_initial_state(location_input: str, user_profile: str = None) -> Local
     }
 
 def run_analysis(graph, initial_state: LocalityState):
-    """Run the graph workflow with real-time progress updates."""
+    """
+    Run the graph workflow with real-time progress updates.
     
-    # Create collapsible progress section (expanded during execution)
-    progress_expander = st.expander("📊 Analysis Progress", expanded=True)
+    The status container is drawn before the graph starts, so the click is
+    acknowledged immediately; the graph is then driven through its async
+    stream and each node transition updates the status label. Summary tokens
+    are rendered as the LLM emits them instead of after the full completion.
+    """
+    
+    # Create collapsible status section (expanded during execution)
+    status = st.status("🔄 Analyzing locality...", expanded=True)
     
-    with progress_expander:
+    with status:
         # Progress bar and status
-        status_placeholder = st.empty()
         progress_bar = st.progress(0)
         progress_text = st.empty()
         
-        # Steps checklist (real-time updates)
-        steps_placeholder = st.empty()
+        # Steps checklist (real-time updates), created below once the steps
+        # are defined: one placeholder per step
+        steps_container = st.container()
+    
+    # Live summary tokens (outside the status so they stay visible)
+    summary_stream = st.empty()
     
     start_time = time.time()
     
-    # Step definitions with weights for progress calculation
+    # Fresh per-run status on top of the static step definitions; the entry
+    # point starts immediately
     step_definitions = {
-        "validate": {
-            "name": "Validating Input",
-            "icon": "🔍",
-            "weight": 0.03,
-            "status": "pending"
-        },
-        "intent": {
-            "name": "Extracting Intent & Selecting Metrics",
-            "icon": "🎯",
-            "weight": 0.12,
-            "status": "pending"
-        },
-        "geocode": {
-            "name": "Geocoding Location",
-            "icon": "🌍",
-            "weight": 0.08,
-            "status": "pending"
-        },
-        "fetch": {
-            "name": "Fetching Location Data",
-            "icon": "🗺️",
-            "weight": 0.55,
-            "status": "pending"
-        },
-        "calculate": {
-            "name": "Calculating Statistics",
-            "icon": "📊",
-            "weight": 0.10,
-            "status": "pending"
-        },
-        "summarize": {
-            "name": "Generating AI Summary",
-            "icon": "🤖",
-            "weight": 0.12,
-            "status": "pending"
-        }
+        step_key: {**step_info, "status": "pending"}
+        for step_key, step_info in STEP_DEFINITIONS.items()
     }
+    step_definitions["validate"]["status"] = "running"
+    
+    with steps_container:
+        step_placeholders = {step_key: st.empty() for step_key in step_definitions}
     
     last_node = None
-    final_state = None
+    final_state = dict(initial_state)  # Replaced by each "values" snapshot
+    streamed_summary = ""
+    rendered_len = 0
+    rendered_status = {}  # step_key -> status last written to its placeholder
+    rendered_pct = None  # Progress percentage last written
+    rendered_running = None  # Running steps shown in the status label
+    progress_accum = 0.0  # Total weight of completed steps
+    ui_dirty = False  # Step state changed since the last UI flush
+    last_ui_ts = 0.0  # time.monotonic() of the last UI flush
+    
+    def complete_step(step_key):
+        """Mark a step completed, adding its weight to the progress once."""
+        nonlocal progress_accum
+        step_info = step_definitions[step_key]
+        if step_info["status"] != "completed":
+            step_info["status"] = "completed"
+            progress_accum += step_info["weight"]
     
     def update_ui():
-        """Update UI elements with current step status."""
-        # Calculate progress
-        total_weight = sum(
-            step_info["weight"] 
-            for step_info in step_definitions.values() 
-            if step_info["status"] == "completed"
-        )
+        """Update UI elements with current step status (changed steps only)."""
+        nonlocal rendered_pct
         
-        # Update progress bar
-        progress_bar.progress(min(total_weight, 0.95))
-        progress_text.text(f"**{int(total_weight * 100)}% Complete**")
+        # Update progress bar (only when the shown percentage changes)
+        pct = int(progress_accum * 100)
+        if pct != rendered_pct:
+            progress_bar.progress(min(progress_accum, 0.95))
+            progress_text.text(f"**{pct}% Complete**")
+            rendered_pct = pct
         
-        # Build steps display
-        steps_display = []
+        # Update steps display, re-emitting only lines whose status changed
         for step_key, step_info in step_definitions.items():
-            status = step_info["status"]
-            icon = step_info["icon"]
-            name = step_info["name"]
+            step_status = step_info["status"]
+            if rendered_status.get(step_key) == step_status:
+                continue
             
-            if status == "completed":
-                steps_display.append(f"✅ **{icon} {name}**")
-            elif status == "running":
-                steps_display.append(f"⏳ **{icon} {name}** *(in progress...)*")
-            else:
-                steps_display.append(f"⏸️ {icon} {name}")
+            step_placeholders[step_key].markdown(STEP_LINES[step_key][step_status])
+            rendered_status[step_key] = step_status
+    
+    def flush_ui():
+        """Push the current step state to the status label and checklist."""
+        nonlocal ui_dirty, last_ui_ts, rendered_running
+        elapsed = time.time() - start_time
+        
+        # Update status label with everything currently running (skipped
+        # when the same steps are still running)
+        running = [
+            f"{step_info['icon']} {step_info['name']}"
+            for step_info in step_definitions.values()
+            if step_info["status"] == "running"
+        ]
+        if running and running != rendered_running:
+            status.update(label=f"{' + '.join(running)}... (elapsed: {elapsed:.1f}s)")
+            rendered_running = running
         
-        # Update steps display
-        with steps_placeholder.container():
-            for step_line in steps_display:
-                st.markdown(step_line)
+        update_ui()
+        ui_dirty = False
+        last_ui_ts = time.monotonic()
+    
+    async def consume_stream():
+        """Drive the graph asynchronously, updating the UI per node."""
+        nonlocal last_node, final_state, streamed_summary, rendered_len, ui_dirty
+        
+        # Stream execution - "updates" carries node names (and only the keys
+        # each node wrote), "values" carries the merged state after each step,
+        # "messages" carries LLM tokens as they are generated, "custom"
+        # carries sub-steps finished inside a node
+        async for mode, event in graph.astream(
+            initial_state, stream_mode=["updates", "values", "messages", "custom"]
+        ):
+            if mode == "values":
+                final_state = event
+                # End of a superstep: flush anything the throttle held back
+                if ui_dirty:
+                    flush_ui()
+                continue
+            
+            if mode == "messages":
+                chunk, metadata = event
+                # Only the summary is user-facing; intent extraction is internal
+                if metadata.get("langgraph_node") == "generate_summary" and chunk.content:
+                    streamed_summary += chunk.content
+                    # Re-render per sentence / ~10 words, not per token
+                    if (len(streamed_summary) - rendered_len >= SUMMARY_RENDER_CHARS
+                            or chunk.content.rstrip().endswith((".", "!", "?", "\n"))):
+                        render_summary(summary_stream, streamed_summary, cursor=True)
+                        rendered_len = len(streamed_summary)
+                continue
+            
+            # Event structure: {node_name: partial_state_dict}, emitted when
+            # the node finishes; custom events: {"completed": node_name}
+            finished = [event["completed"]] if mode == "custom" else event
+            for node_name in finished:
+                current_step = NODE_STEPS.get(node_name)
+                if not current_step:
+                    continue
+                
+                complete_step(current_step)
+                last_node = current_step
+                
+                # Intent and geocode + fetch run concurrently, so several steps
+                # can be in flight; start every step whose inputs are done
+                for step_key, prereqs in STEP_PREREQS.items():
+                    if step_definitions[step_key]["status"] == "pending" and all(
+                        step_definitions[prereq]["status"] == "completed" for prereq in prereqs
+                    ):
+                        step_definitions[step_key]["status"] = "running"
+                
+                # Coalesce bursts of node completions into one UI update
+                ui_dirty = True
+                if time.monotonic() - last_ui_ts >= UI_UPDATE_INTERVAL_S:
+                    flush_ui()
     
     try:
         # Initial render
-        status_placeholder.info("🔄 **Initializing analysis...**")
         update_ui()
         
-        # Stream execution - use "updates" mode to get node names
-        for event in graph.stream(initial_state, stream_mode="updates"):
-            # Event structure: {node_name: state_dict}
-            for node_name, state in event.items():
-                if isinstance(state, dict):
-                    steps = state.get("processing_steps", [])
-                    if steps:
-                        step_text = steps[-1].lower()
-                        elapsed = time.time() - start_time
-                        
-                        # Determine which step is running/completed based on node name
-                        current_step = None
-                        
-                        if node_name == "validate_input" or "validate" in step_text:
-                            current_step = "validate"
-                        elif node_name == "extract_intent_and_select_metrics" or "intent" in step_text or "extract" in step_text:
-                            current_step = "intent"
-                        elif node_name == "geocode_location" or "geocode" in step_text:
-                            current_step = "geocode"
-                        elif node_name == "fetch_osm_data" or "fetch_osm" in step_text:
-                            current_step = "fetch"
-                        elif node_name == "calculate_statistics" or "calculate" in step_text:
-                            current_step = "calculate"
-                        elif node_name == "generate_summary" or "generate_summary" in step_text or "summary" in step_text:
-                            current_step = "summarize"
-                        
-                        # Update step status when node changes
-                        if current_step and current_step != last_node:
-                            # Mark previous step as completed
-                            if last_node:
-                                step_definitions[last_node]["status"] = "completed"
-                            
-                            # Mark current step as running
-                            if step_definitions[current_step]["status"] == "pending":
-                                step_definitions[current_step]["status"] = "running"
-                            
-                            last_node = current_step
-                            
-                            # Update status message
-                            step_info = step_definitions[current_step]
-                            status_placeholder.info(
-                                f"**{step_info['icon']} {step_info['name']}...**\n"
-                                f"*Elapsed: {elapsed:.1f}s*"
-                            )
-                            
-                            # Update UI immediately
-                            update_ui()
-                            
-                            # Force Streamlit to update by adding a small delay
-                            time.sleep(0.1)
-                        
-                        # Store final state
-                        final_state = state
+        asyncio.run(consume_stream())
         
         # Mark final step as completed
         if last_node:
-            step_definitions[last_node]["status"] = "completed"
+            complete_step(last_node)
         
         # Mark all remaining steps as completed
         for step_key in step_definitions:
             if step_definitions[step_key]["status"] == "pending":
-                step_definitions[step_key]["status"] = "completed"
+                complete_step(step_key)
         
         # Final updates
         elapsed = time.time() - start_time
@@ -276,237 +480,258 @@ def run_analysis(graph, initial_state: LocalityState):
         progress_text.text("**100% Complete** ✅")
         
         # Final status
-        status_placeholder.success(
-            f"**✅ Analysis completed successfully!**\n"
-            f"*Total time: {elapsed:.1f} seconds*"
+        status.update(
+            label=f"✅ Analysis completed successfully! (total time: {elapsed:.1f}s)",
+            state="complete",
+            expanded=False
         )
         
         # Final render of all completed steps
         update_ui()
         
-        # Return final state (use the state from stream, not invoke)
-        if final_state:
-            return final_state
-        else:
-            # Fallback: get result if stream didn't provide final state
-            return graph.invoke(initial_state)
+        # display_results renders the finished summary in the hero section
+        summary_stream.empty()
+        
+        # Return the last merged state from the stream (never re-run the graph)
+        return final_state
         
     except Exception as e:
         progress_bar.progress(1.0)
         progress_text.text("**Error** ❌")
-        status_placeholder.error(f"**❌ Error occurred:** {str(e)}")
+        status.update(label=f"❌ Error occurred: {str(e)}", state="error")
         
-        import traceback
-        with st.expander("🔍 Error Details", expanded=False):
-            st.code(traceback.format_exc())
+        # Traceback is only formatted if the user asks for it (see main)
+        st.session_state.last_error = e
         return None
 
 
-def display_summary_with_typing_effect(placeholder, full_text: str, speed: float = 0.03):
+def render_summary(placeholder, text: str, cursor: bool = False):
     """
-    Display summary with a typing effect (word by word).
+    Render the summary card into a placeholder.
     
     Args:
         placeholder: Streamlit placeholder to update
-        full_text: Complete summary text
-        speed: Delay between words in seconds
+        text: Summary text (complete, or the tokens received so far)
+        cursor: Show a typing cursor after the text (while streaming)
     """
-    words = full_text.split()
-    displayed_text = ""
-    
-    for i, word in enumerate(words):
-        displayed_text += word + " "
-        
-        # Update placeholder with current text
-        placeholder.markdown(f"""
-        <div style='background: #f8f9fa; padding: 20px; border-radius: 8px; 
-                    border-left: 4px solid #667eea; margin-bottom: 30px;'>
-            <p style='font-size: 1.1em; line-height: 1.8; color: #333;'>
-            {displayed_text}<span style='opacity: 0.5;'>|</span>
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Small delay for typing effect
-        time.sleep(speed)
-    
-    # Final render without cursor
-    placeholder.markdown(f"""
-    <div style='background: #f8f9fa; padding: 20px; border-radius: 8px; 
-                border-left: 4px solid #667eea; margin-bottom: 30px;'>
-        <p style='font-size: 1.1em; line-height: 1.8; color: #333;'>
-        {full_text}
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-
-
-def create_location_map(result: LocalityState) -> folium.Map:
+    body = text + _CURSOR_HTML if cursor else text
+    placeholder.html(_SUMMARY_CARD_TEMPLATE.substitute(body=body))
+
+
+# POI category colors (RGB) and emojis, shared by every marker of a category
+_POI_CONFIG = {
+    "schools": {"color": (0, 102, 204), "emoji": "🏫"},
+    "hospitals": {"color": (214, 39, 40), "emoji": "🏥"},
+    "restaurants": {"color": (255, 127, 14), "emoji": "🍽️"},
+    "cafes": {"color": (140, 86, 75), "emoji": "☕"},
+    "metro_stations": {"color": (148, 103, 189), "emoji": "🚇"},
+    "bus_stops": {"color": (44, 160, 44), "emoji": "🚌"},
+    "parks": {"color": (23, 190, 107), "emoji": "🌳"},
+    "gyms": {"color": (139, 0, 0), "emoji": "💪"},
+    "pharmacies": {"color": (255, 152, 150), "emoji": "💊"},
+    "banks": {"color": (0, 100, 0), "emoji": "🏦"},
+    "libraries": {"color": (0, 0, 139), "emoji": "📚"},
+    "shops": {"color": (227, 119, 194), "emoji": "🛍️"},
+}
+_DEFAULT_POI_CONFIG = {"color": (128, 128, 128), "emoji": "📍"}
+
+
+def collect_poi_markers(lat: float, lon: float, osm_data: dict) -> tuple:
     """
-    Create an interactive Folium map showing the location, search radius, and POIs.
+    Collect map markers for key POIs from OSM data.
     
-    Adds markers for key POIs from OSM data.
+    Returns:
+        Hashable flat tuple of markers: ((lat, lon, label, color), ...)
     """
-    if not result.get("coordinates"):
-        return None
-    
-    lat, lon = result["coordinates"]
-    osm_data = result.get("osm_data", {})
-    
-    # Create map centered on location
-    m = folium.Map(
-        location=[lat, lon],
-        zoom_start=14,
-        tiles='OpenStreetMap'
-    )
-    
-    # Add center marker (the analyzed location)
-    folium.Marker(
-        [lat, lon],
-        popup=f"📍 Analysis Location\n{result.get('address', 'Unknown')}",
-        tooltip="Analysis Location",
-        icon=folium.Icon(
-            color="red",
-            icon="home",
-            prefix="fa"
-        )
-    ).add_to(m)
-    
-    # Add search radius circle (1000m = 1km)
-    folium.Circle(
-        location=[lat, lon],
-        radius=1000,  # 1km radius
-        popup="Search Radius: 1km",
-        color="blue",
-        fill=True,
-        fillColor="blue",
-        fillOpacity=0.1,
-        weight=2
-    ).add_to(m)
-    
-    # Add a larger radius circle (2km) for reference
-    folium.Circle(
-        location=[lat, lon],
-        radius=2000,  # 2km radius
-        popup="Extended Radius: 2km",
-        color="gray",
-        fill=False,
-        weight=1,
-        dashArray="5, 5"
-    ).add_to(m)
-    
-    # ========================================================================
-    # ADD POI MARKERS FROM OSM DATA
-    # ========================================================================
-    
-    # POI category icons and colors
-    poi_config = {
-        "schools": {"icon": "graduation-cap", "color": "blue", "emoji": "🏫"},
-        "hospitals": {"icon": "hospital", "color": "red", "emoji": "🏥"},
-        "restaurants": {"icon": "cutlery", "color": "orange", "emoji": "🍽️"},
-        "cafes": {"icon": "coffee", "color": "brown", "emoji": "☕"},
-        "metro_stations": {"icon": "train", "color": "purple", "emoji": "🚇"},
-        "bus_stops": {"icon": "bus", "color": "green", "emoji": "🚌"},
-        "parks": {"icon": "tree", "color": "green", "emoji": "🌳"},
-        "gyms": {"icon": "dumbbell", "color": "darkred", "emoji": "💪"},
-        "pharmacies": {"icon": "medkit", "color": "lightred", "emoji": "💊"},
-        "banks": {"icon": "university", "color": "darkgreen", "emoji": "🏦"},
-        "libraries": {"icon": "book", "color": "darkblue", "emoji": "📚"},
-        "shops": {"icon": "shopping-cart", "color": "pink", "emoji": "🛍️"},
-    }
+    import numpy as np
     
     # Sample POIs from each category (limit to avoid overcrowding)
     max_pois_per_category = 10
     poi_count = 0
     max_total_pois = 50  # Limit total POIs to keep map readable
+    markers = []
+    
+    # Longitude degrees shrink with latitude; constant for this center
+    lon_scale = math.cos(math.radians(lat))
+    
+    # One pass to pick non-empty categories, largest first, so the overall
+    # marker cap favors the categories with the most POIs
+    categories = sorted(
+        (
+            (category, data, data.get("count", 0))
+            for category, data in osm_data.items()
+            if isinstance(data, dict) and data.get("count", 0) > 0
+        ),
+        key=lambda item: item[2],
+        reverse=True
+    )
     
-    for category, data in osm_data.items():
+    for category, data, count in categories:
         if poi_count >= max_total_pois:
             break
-            
-        if not isinstance(data, dict):
-            continue
-            
-        count = data.get("count", 0)
-        if count == 0:
-            continue
         
         # Get POI config
-        config = poi_config.get(category, {"icon": "info", "color": "gray", "emoji": "📍"})
+        config = _POI_CONFIG.get(category, _DEFAULT_POI_CONFIG)
+        category_name = category.replace("_", " ").title()
+        color = config["color"]
         
-        # Get POI data points if available
-        poi_list = data.get("data", [])
+        # Get POI locations if available (parallel lats/lons/names lists)
+        try:
+            points = data["points"]
+            poi_lats, poi_lons, poi_names = points["lats"], points["lons"], points["names"]
+        except (KeyError, TypeError):
+            poi_lats = poi_lons = poi_names = ()
         
         # If we have actual POI coordinates, use them
-        if poi_list and isinstance(poi_list, list) and len(poi_list) > 0:
-            # Sample up to max_pois_per_category
-            sample_pois = poi_list[:max_pois_per_category]
-            
-            for poi in sample_pois:
-                if poi_count >= max_total_pois:
-                    break
-                    
-                if isinstance(poi, dict):
-                    # Try to get coordinates from POI
-                    geometry = poi.get("geometry")
-                    if geometry:
-                        # Handle different geometry formats
-                        if isinstance(geometry, dict):
-                            coords = geometry.get("coordinates")
-                            if coords and len(coords) >= 2:
-                                poi_lat, poi_lon = coords[1], coords[0]  # GeoJSON format
-                                
-                                name = poi.get("name", category.replace("_", " ").title())
-                                
-                                folium.Marker(
-                                    [poi_lat, poi_lon],
-                                    popup=f"{config['emoji']} {name}",
-                                    tooltip=category.replace("_", " ").title(),
-                                    icon=folium.Icon(
-                                        color=config["color"],
-                                        icon=config["icon"],
-                                        prefix="fa"
-                                    )
-                                ).add_to(m)
-                                
-                                poi_count += 1
+        if poi_lats:
+            placed = min(len(poi_lats), max_pois_per_category, max_total_pois - poi_count)
+            markers.extend(
+                (poi_lat, poi_lon, f"{config['emoji']} {name}", color)
+                for poi_lat, poi_lon, name in zip(
+                    poi_lats[:placed], poi_lons[:placed], poi_names[:placed]
+                )
+            )
+            poi_count += placed
         else:
             # If no specific coordinates, create representative markers around the center
             # This is a fallback - distribute markers in a circle
             category_count = min(count, max_pois_per_category)
+            # Respect the overall cap without changing the circle spacing
+            placed = min(category_count, max_total_pois - poi_count)
             
-            for i in range(category_count):
-                if poi_count >= max_total_pois:
-                    break
-                
-                # Distribute in a circle around center (within 1km radius)
-                angle = (2 * math.pi * i) / category_count
-                distance = 500 + (i % 3) * 200  # Vary distance slightly
-                poi_lat = lat + (distance / 111000) * math.cos(angle)
-                poi_lon = lon + (distance / 111000) * math.sin(angle) / math.cos(math.radians(lat))
-                
-                folium.Marker(
-                    [poi_lat, poi_lon],
-                    popup=f"{config['emoji']} {category.replace('_', ' ').title()} ({count} total)",
-                    tooltip=category.replace("_", " ").title(),
-                    icon=folium.Icon(
-                        color=config["color"],
-                        icon=config["icon"],
-                        prefix="fa"
-                    )
-                ).add_to(m)
-                
-                poi_count += 1
+            # Distribute in a circle around center (within 1km radius),
+            # computing every offset for the category in one shot
+            angles = np.linspace(0, 2 * np.pi, category_count, endpoint=False)[:placed]
+            distances = 500 + (np.arange(placed) % 3) * 200  # Vary distance slightly
+            poi_lats = lat + (distances / 111000) * np.cos(angles)
+            poi_lons = lon + (distances / 111000) * np.sin(angles) / lon_scale
+            
+            label = f"{config['emoji']} {category_name} ({count} total)"
+            markers.extend(
+                (float(poi_lat), float(poi_lon), label, color)
+                for poi_lat, poi_lon in zip(poi_lats, poi_lons)
+            )
+            poi_count += placed
     
-    return m
+    return tuple(markers)
 
 
+@st.cache_resource(max_entries=64, show_spinner=False)
+def build_location_map(lat: float, lon: float, zoom: int, markers: tuple, address: str) -> pdk.Deck:
+    """
+    Build the deck.gl map for a location, cached per (lat, lon, zoom, markers).
+    
+    Reruns that don't move the map (tab switches, widget changes) reuse the
+    same Deck instead of rebuilding every layer. cache_resource is used
+    because a Deck is a read-only render spec that never needs copying.
+    
+    Args:
+        lat: Latitude of the analyzed location
+        lon: Longitude of the analyzed location
+        zoom: Initial zoom level
+        markers: POI marker groups from collect_poi_markers()
+        address: Address shown in the center marker tooltip
+    """
+    import pydeck as pdk
+    
+    # Search radius circles (bottom-most layers)
+    center = [{"lat": lat, "lon": lon, "label": f"📍 Analysis Location\n{address}"}]
+    layers = [
+        # Extended 2km radius for reference
+        pdk.Layer(
+            "ScatterplotLayer",
+            data=center,
+            get_position=["lon", "lat"],
+            get_radius=2000,
+            radius_units="meters",
+            filled=False,
+            stroked=True,
+            get_line_color=[128, 128, 128],
+            line_width_min_pixels=1
+        ),
+        # 1km search radius
+        pdk.Layer(
+            "ScatterplotLayer",
+            data=center,
+            get_position=["lon", "lat"],
+            get_radius=1000,
+            radius_units="meters",
+            filled=True,
+            get_fill_color=[0, 0, 255, 25],
+            stroked=True,
+            get_line_color=[0, 0, 255],
+            line_width_min_pixels=2
+        ),
+    ]
+    
+    # All POIs go into a single layer with per-point colors: one data
+    # array to serialize and one draw call, regardless of category count
+    if markers:
+        layers.append(pdk.Layer(
+            "ScatterplotLayer",
+            data=[
+                {"lat": p_lat, "lon": p_lon, "label": label, "color": color}
+                for p_lat, p_lon, label, color in markers
+            ],
+            get_position=["lon", "lat"],
+            get_radius=30,
+            radius_min_pixels=5,
+            get_fill_color="color",
+            stroked=True,
+            get_line_color=[255, 255, 255],
+            line_width_min_pixels=1,
+            pickable=True
+        ))
+    
+    # Center marker (the analyzed location) on top
+    layers.append(pdk.Layer(
+        "ScatterplotLayer",
+        data=center,
+        get_position=["lon", "lat"],
+        get_radius=40,
+        radius_min_pixels=8,
+        get_fill_color=[220, 20, 60],
+        stroked=True,
+        get_line_color=[255, 255, 255],
+        line_width_min_pixels=2,
+        pickable=True
+    ))
+    
+    return pdk.Deck(
+        layers=layers,
+        initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=zoom),
+        map_provider="carto",
+        map_style=BASEMAP_STYLE,
+        tooltip={"text": "{label}"}
+    )
+
+
+def create_location_map(result: LocalityState) -> pdk.Deck:
+    """
+    Create an interactive deck.gl map showing the location, search radius, and POIs.
+    
+    Rendered client-side over a vector basemap, so pans and zooms happen in the
+    browser without a Streamlit rerun. Adds markers for key POIs from OSM data.
+    """
+    if not result.get("coordinates"):
+        return None
+    
+    lat, lon = result["coordinates"]
+    markers = collect_poi_markers(lat, lon, result.get("osm_data", {}))
+    
+    return build_location_map(lat, lon, 14, markers, result.get("address") or "Unknown")
+
+
+@st.fragment
 def display_results(result: LocalityState):
     """
     Display results with optimal UX:
     1. Hero: Summary + Key Insights (most important first)
     2. Quick Stats: Top metrics at a glance
     3. Tabs: Organized details (Map, Statistics, Details)
+    
+    Runs as a fragment so interactions inside the results don't rerun the
+    whole script (and never re-invoke the graph).
     """
     
     if not result:
@@ -535,21 +760,12 @@ def display_results(result: LocalityState):
     # ============================================================================
     st.markdown("---")
     
-    # AI-Generated Summary (Hero) with Live Typing Effect
+    # AI-Generated Summary (Hero)
     if result.get("summary"):
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 30px; border-radius: 10px; color: white; margin-bottom: 20px;'>
-            <h2 style='color: white; margin-bottom: 15px;'>🤖 AI Analysis Summary</h2>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Create placeholder for streaming summary
-        summary_placeholder = st.empty()
+        st.html(_SUMMARY_HEADER_HTML)
         
-        # Stream summary word by word for typing effect
-        summary_text = result["summary"]
-        display_summary_with_typing_effect(summary_placeholder, summary_text)
+        # Tokens were already streamed live during the run; render in full
+        render_summary(st.empty(), result["summary"])
     
     # ============================================================================
     # QUICK STATS: Top Metrics at a Glance
@@ -562,15 +778,16 @@ def display_results(result: LocalityState):
         # Get top metrics based on user profile or default important ones
         top_metrics = get_top_metrics(stats, result.get("selected_metrics", []))
         
-        # Display in a grid
-        num_cols = min(4, len(top_metrics))
-        cols = st.columns(num_cols)
-        
-        for idx, (metric, value) in enumerate(top_metrics.items()):
-            with cols[idx % num_cols]:
-                metric_name = format_metric_name(metric)
-                icon = get_metric_icon(metric)
-                st.metric(f"{icon} {metric_name}", format_metric_value(value))
+        # Display in a grid (no columns at all when nothing matched)
+        if top_metrics:
+            num_cols = min(4, len(top_metrics))
+            cols = st.columns(num_cols)
+            
+            for idx, (metric, value) in enumerate(top_metrics.items()):
+                with cols[idx % num_cols]:
+                    metric_name = format_metric_name(metric)
+                    icon = get_metric_icon(metric)
+                    st.metric(f"{icon} {metric_name}", format_metric_value(value))
     
     st.markdown("---")
     
@@ -596,40 +813,36 @@ def display_results(result: LocalityState):
         display_technical_details(result)
 
 
+# Priority order for quick-stats metrics
+_PRIORITY_METRICS = (
+    "school_count", "hospital_count", "metro_station_count",
+    "restaurant_count", "park_area_km2", "poi_density",
+    "walkability_score", "accessibility_score", "bus_stop_count",
+    "gym_fitness_count", "shopping_count"
+)
+
+
 def get_top_metrics(statistics: dict, selected_metrics: list, max_count: int = 8) -> dict:
     """Get top metrics to display in quick stats."""
-    # Priority order for metrics
-    priority_metrics = [
-        "school_count", "hospital_count", "metro_station_count",
-        "restaurant_count", "park_area_km2", "poi_density",
-        "walkability_score", "accessibility_score", "bus_stop_count",
-        "gym_fitness_count", "shopping_count"
-    ]
+    # Selected metrics come first (if any), then fill with priority metrics
+    top = {k: statistics[k] for k in selected_metrics[:max_count] if k in statistics}
     
-    # If metrics were selected, prioritize those
-    if selected_metrics:
-        # Get selected metrics that exist in statistics
-        top = {k: statistics[k] for k in selected_metrics[:max_count] if k in statistics}
-        if len(top) < max_count:
-            # Fill with priority metrics
-            for metric in priority_metrics:
-                if metric in statistics and metric not in top:
-                    top[metric] = statistics[metric]
-                    if len(top) >= max_count:
-                        break
-        return top
-    
-    # Otherwise use priority order
-    top = {}
-    for metric in priority_metrics:
-        if metric in statistics:
-            top[metric] = statistics[metric]
-            if len(top) >= max_count:
-                break
+    if len(top) < max_count:
+        fill = (m for m in _PRIORITY_METRICS if m in statistics and m not in top)
+        top.update((m, statistics[m]) for m in islice(fill, max_count - len(top)))
     
     return top
 
 
+# Metric name keyword -> icon, checked in order (first match wins)
+_METRIC_ICONS = (
+    ("school", "🏫"), ("hospital", "🏥"), ("metro", "🚇"), ("restaurant", "🍽️"),
+    ("park", "🌳"), ("gym", "💪"), ("bus", "🚌"), ("shopping", "🛍️"),
+    ("walkability", "🚶"), ("accessibility", "♿"), ("poi", "📍"),
+)
+
+
+@lru_cache(maxsize=256)
 def format_metric_name(metric: str) -> str:
     """Format metric name for display."""
     return metric.replace("_", " ").title()
@@ -640,33 +853,35 @@ def format_metric_value(value) -> str:
     if value is None:
         return "N/A"
     elif isinstance(value, (int, float)):
-        if isinstance(value, float) and value < 1:
-            return f"{value:.2f}"
-        elif isinstance(value, float):
-            return f"{value:.1f}"
-        else:
-            return str(value)
+        return _format_number(value)
+    else:
+        return str(value)
+
+
+@lru_cache(maxsize=256, typed=True)
+def _format_number(value) -> str:
+    """Format a numeric metric value (typed cache: 1, 1.0 and True differ)."""
+    if isinstance(value, float) and value < 1:
+        return f"{value:.2f}"
+    elif isinstance(value, float):
+        return f"{value:.1f}"
     else:
         return str(value)
 
 
+@lru_cache(maxsize=256)
 def get_metric_icon(metric: str) -> str:
     """Get icon for metric."""
-    icon_map = {
-        "school": "🏫", "hospital": "🏥", "metro": "🚇", "restaurant": "🍽️",
-        "park": "🌳", "gym": "💪", "bus": "🚌", "shopping": "🛍️",
-        "walkability": "🚶", "accessibility": "♿", "poi": "📍"
-    }
-    
     metric_lower = metric.lower()
-    for key, icon in icon_map.items():
+    for key, icon in _METRIC_ICONS:
         if key in metric_lower:
             return icon
     return "📊"
 
 
+@st.fragment
 def display_map_and_location(result: LocalityState):
-    """Display map and location information."""
+    """Display map and location information (own fragment, reruns independently)."""
     # Location Info
     col1, col2 = st.columns(2)
     
@@ -691,21 +906,16 @@ def display_map_and_location(result: LocalityState):
         location_map = create_location_map(result)
         
         if location_map:
-            # Full width map
-            map_data = st_folium(
-                location_map,
-                width=None,  # Full width
-                height=600,  # Increased height
-                returned_objects=["last_object_clicked"]
-            )
+            # Full width map (rendered in the browser, no rerun on pan/zoom)
+            st.pydeck_chart(location_map, use_container_width=True)
             
             with st.expander("ℹ️ Map Guide", expanded=False):
                 st.markdown("""
                 **Map Features:**
-                - 🔴 **Red marker**: Analysis location (center)
+                - 🔴 **Red dot**: Analysis location (center)
                 - 🔵 **Blue circle**: 1km search radius (primary analysis area)
                 - ⚪ **Gray circle**: 2km extended radius (reference)
-                - 🏫 **Colored markers**: Nearby POIs (schools, hospitals, restaurants, etc.)
+                - 🏫 **Colored dots**: Nearby POIs (schools, hospitals, restaurants, etc.)
                 
                 **POI Categories:**
                 - 🏫 Schools (Blue) | 🏥 Hospitals (Red) | 🍽️ Restaurants (Orange)
@@ -713,12 +923,39 @@ def display_map_and_location(result: LocalityState):
                 - 💪 Gyms (Dark Red) | 💊 Pharmacies (Light Red) | 🏦 Banks (Dark Green)
                 
                 **Interactions:**
-                - Click markers for details
+                - Hover markers for details
                 - Zoom in/out with mouse wheel
                 - Drag to pan around
                 """)
 
 
+# Statistics categories, in display order. Each pattern is a compiled
+# alternation of the category's keywords; the first match wins.
+_OTHER_METRICS = "📍 Other Metrics"
+_STAT_CATEGORIES = (
+    ("🎓 Education & Childcare", ["school", "university", "kindergarten", "childcare", "tuition"]),
+    ("🏥 Healthcare", ["hospital", "clinic", "pharmacy", "health"]),
+    ("🍽️ Food & Dining", ["restaurant", "cafe", "fast_food", "food"]),
+    ("🚇 Transportation", ["metro", "bus", "road", "accessibility", "walkability"]),
+    ("🌳 Recreation & Green Spaces", ["park", "gym", "sports", "playground", "green", "leisure"]),
+    ("🛍️ Shopping & Services", ["shop", "bank", "atm", "shopping"]),
+)
+_STAT_CATEGORY_PATTERNS = tuple(
+    (category, re.compile("|".join(map(re.escape, keywords))))
+    for category, keywords in _STAT_CATEGORIES
+)
+
+
+@lru_cache(maxsize=256)
+def categorize_metric(metric: str) -> str:
+    """Get the statistics category a metric is displayed under."""
+    metric_lower = metric.lower()
+    for category, pattern in _STAT_CATEGORY_PATTERNS:
+        if pattern.search(metric_lower):
+            return category
+    return _OTHER_METRICS
+
+
 def display_detailed_statistics(result: LocalityState):
     """Display detailed statistics organized by category."""
     if not result.get("statistics"):
@@ -732,42 +969,26 @@ def display_detailed_statistics(result: LocalityState):
         st.info(f"📌 Showing {len(stats)} metrics selected based on your profile")
     
     # Organize by category
-    categories = {
-        "🎓 Education & Childcare": ["school", "university", "kindergarten", "childcare", "tuition"],
-        "🏥 Healthcare": ["hospital", "clinic", "pharmacy", "health"],
-        "🍽️ Food & Dining": ["restaurant", "cafe", "fast_food", "food"],
-        "🚇 Transportation": ["metro", "bus", "road", "accessibility", "walkability"],
-        "🌳 Recreation & Green Spaces": ["park", "gym", "sports", "playground", "green", "leisure"],
-        "🛍️ Shopping & Services": ["shop", "bank", "atm", "shopping"],
-        "📍 Other Metrics": []
-    }
-    
-    categorized = {cat: [] for cat in categories}
+    categorized = {category: [] for category, _ in _STAT_CATEGORIES}
+    categorized[_OTHER_METRICS] = []
     
     # Categorize metrics
     for metric, value in stats.items():
-        categorized_flag = False
-        for category, keywords in categories.items():
-            if category == "📍 Other Metrics":
-                continue
-            if any(keyword in metric.lower() for keyword in keywords):
-                categorized[category].append((metric, value))
-                categorized_flag = True
-                break
-        if not categorized_flag:
-            categorized["📍 Other Metrics"].append((metric, value))
-    
-    # Display by category
+        categorized[categorize_metric(metric)].append((metric, value))
+    
+    # Display by category: one table per category instead of a metric
+    # widget per value
     for category, items in categorized.items():
         if items:
             st.subheader(category)
-            cols = st.columns(min(4, len(items)))
-            for idx, (metric, value) in enumerate(items):
-                with cols[idx % len(cols)]:
-                    metric_name = format_metric_name(metric)
-                    icon = get_metric_icon(metric)
-                    st.metric(f"{icon} {metric_name}", format_metric_value(value))
-            st.markdown("")
+            st.dataframe(
+                {
+                    "Metric": [f"{get_metric_icon(m)} {format_metric_name(m)}" for m, _ in items],
+                    "Value": [format_metric_value(v) for _, v in items],
+                },
+                hide_index=True,
+                use_container_width=True
+            )
 
 
 def display_personalization_info(result: LocalityState):
@@ -827,17 +1048,16 @@ def display_technical_details(result: LocalityState):
     # Processing Steps
     if result.get("processing_steps"):
         with st.expander("📋 Processing Steps", expanded=False):
-            for step in result["processing_steps"]:
-                st.caption(f"• {step}")
+            st.caption("\n".join(f"- {step}" for step in result["processing_steps"]))
     
     # OSM Data
     if result.get("osm_data"):
         with st.expander("🗺️ Raw OSM Data", expanded=False):
-            for category, data in result["osm_data"].items():
-                if isinstance(data, dict) and "count" in data:
-                    count = data["count"]
-                    category_name = category.replace("_", " ").title()
-                    st.write(f"**{category_name}**: {count} found")
+            st.markdown("\n".join(
+                f"- **{category.replace('_', ' ').title()}**: {data['count']} found"
+                for category, data in result["osm_data"].items()
+                if isinstance(data, dict) and "count" in data
+            ))
     
     # State Info
     with st.expander("⚙️ State Information", expanded=False):
@@ -856,36 +1076,82 @@ def display_technical_details(result: LocalityState):
 def main():
     """Main Streamlit application."""
     st.set_page_config(
-        page_title=APP_NAME,
+        page_title=get_settings().app_name,
         page_icon="🏘️",
         layout="wide",
         initial_sidebar_state="collapsed"
     )
     
-    # Initialize graph (cached)
+    # Take the query queued by the submit callback (once per click)
+    pending_query = st.session_state.pop("pending_query", None)
+    force_refresh = st.session_state.pop("force_refresh", False)
+    
+    # Render input form first so the page paints before the graph loads
+    render_input_form()
+    
+    # Initialize graph (compiled once per process, before any submit)
     graph = get_graph()
     
     if graph is None:
         st.error("Failed to initialize the analysis system. Please check your configuration.")
         st.stop()
     
-    # Render input form
-    location_input, user_profile, submit_button = render_input_form()
-    
-    # Process on submit
-    if submit_button:
+    # Process the submitted query
+    if pending_query:
+        location_input, user_profile = pending_query
         if not location_input or not location_input.strip():
             st.warning("⚠️ Please enter a location")
         else:
-            # Create initial state
-            initial_state = create_initial_state(location_input, user_profile)
+            location_key = normalize_location_key(location_input)
+            session_key = (location_key, user_profile or "")
+            st.session_state.pop("last_error", None)
             
-            # Run analysis
-            result = run_analysis(graph, initial_state)
+            result = None
+            if not force_refresh:
+                # Repeat queries are served from this session's results,
+                # then from the per-locality cache shared across sessions
+                result = session_cache().get(session_key)
+                if result is None:
+                    result = get_shared_analysis(session_key)
             
-            # Display results
-            if result:
-                display_results(result)
+            if result is not None:
+                remember_analysis(session_key, result)
+                st.caption("⚡ Showing cached analysis for this location")
+            else:
+                # Popular localities may have been pre-computed offline
+                # (scripts/prebake.py); those runs carry no user profile
+                if not user_profile and not force_refresh:
+                    from src.utils.result_store import load_prebaked_result
+                    result = load_prebaked_result(location_input)
+                
+                if result is None:
+                    # Create initial state
+                    initial_state = create_initial_state(location_input, user_profile)
+                    
+                    # Run analysis
+                    result = run_analysis(graph, initial_state)
+                
+                # Only cache clean runs; errors may be transient (e.g. API timeouts).
+                # A re-analysis simply overwrites the existing entries
+                if result and not result.get("errors"):
+                    put_shared_analysis(session_key, result)
+                    remember_analysis(session_key, result)
+            
+            # Keep the result across reruns; later interactions only redraw it
+            st.session_state.last_query = pending_query
+            st.session_state.last_result = result
+    
+    # Error details for the last failed run, formatted on demand
+    last_error = st.session_state.get("last_error")
+    if last_error is not None and st.button("🔍 Show error details"):
+        import traceback
+        st.code("".join(traceback.format_exception(last_error)))
+    
+    # Display results (from this run or an earlier one)
+    result = st.session_state.get("last_result")
+    if result:
+        st.button("🔄 Re-analyze", on_click=reanalyze_last_query)
+        display_results(result)
     
     # Sidebar with info
     with st.sidebar:
@@ -917,6 +1183,13 @@ def main():
         """)
         
         st.markdown("---")
+        with st.expander("🛠️ Debug", expanded=False):
+            if st.button("🧹 Clear cached maps & analyses", use_container_width=True):
+                build_location_map.clear()
+                clear_shared_analyses()
+                session_cache().clear()
+                st.toast("Caches cleared")
+        
         st.caption("Built with LangGraph, OSMnx, and Groq LLM")
 
 if __name__ == "__main__":
@@ -1,4 +1,7 @@
 import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -6,29 +9,43 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 ENV_FILE = PROJECT_ROOT / ".env"
 
-# Load .env file explicitly from project root
-if ENV_FILE.exists():
-    load_dotenv(dotenv_path=ENV_FILE)
-    print(f"✅ Loaded .env from: {ENV_FILE}")
-else:
-    # Fallback: try default location
-    load_dotenv()
-    print(f"⚠️ .env file not found at {ENV_FILE}, trying default location")
 
-# API Keys
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+@dataclass(frozen=True)
+class Settings:
+    """Application settings, resolved once per process."""
+    # API Keys
+    groq_api_key: Optional[str]
+    openai_api_key: Optional[str]
+    
+    # App Settings
+    app_name: str = "Locality Lens"
+    default_location: str = "Indiranagar, Bangalore"
+    search_radius: int = 1000  # meters
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Verify API key is loaded
-if not GROQ_API_KEY:
-    print("⚠️ WARNING: GROQ_API_KEY not found in environment variables")
-    print(f"   Check if .env file exists at: {ENV_FILE}")
-    print(f"   File exists: {ENV_FILE.exists()}")
-else:
-    print(f"✅ GROQ_API_KEY loaded (length: {len(GROQ_API_KEY)})")
-
-# App Settings
-APP_NAME = "Locality Lens"
-DEFAULT_LOCATION = "Indiranagar, Bangalore"
-SEARCH_RADIUS = 1000  # meters
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load .env (project root first, then the default lookup) and build Settings.
+    
+    Cached, so the .env lookup and the missing-key warning happen once per
+    process rather than on every import.
+    """
+    # Load .env file explicitly from project root
+    if ENV_FILE.exists():
+        load_dotenv(dotenv_path=ENV_FILE)
+    else:
+        # Fallback: try default location
+        load_dotenv()
+    
+    settings = Settings(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+    )
+    
+    # Verify API key is loaded
+    if not settings.groq_api_key:
+        print("⚠️ WARNING: GROQ_API_KEY not found in environment variables")
+        print(f"   Check if .env file exists at: {ENV_FILE}")
+    
+    return settings
@@ -1,13 +1,19 @@
-# Quick test
+# Quick test (run directly: python metrices_test.py)
 import sys
-sys.path.insert(0, '.')
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
 from src.analysis.metrics_catalog import (
     get_all_metrics,
     get_default_metrics_for_profile,
     get_metrics_for_llm_selection
 )
 
-print(f"Total metrics: {len(get_all_metrics())}")
-print(f"Family metrics: {get_default_metrics_for_profile('Family with Kids')}")
-print("\nFirst 3 metrics for LLM:")
-print(get_metrics_for_llm_selection().split('\n')[:3])
\ No newline at end of file
+if __name__ == "__main__":
+    print(f"Total metrics: {len(get_all_metrics())}")
+    print(f"Family metrics: {get_default_metrics_for_profile('Family with Kids')}")
+    print("\nFirst 3 metrics for LLM:")
+    print(get_metrics_for_llm_selection().split('\n')[:3])
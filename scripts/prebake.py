@@ -0,0 +1,59 @@
+"""
+Pre-compute analyses for popular localities.
+
+Runs the full graph (without a user profile) for every location listed in
+popular_localities.txt and stores the final state under cache/prebaked/,
+where the app picks it up on a cache miss. Re-run weekly (e.g. from cron)
+to keep results fresh.
+
+Localities run a few at a time, so their geocoding and Overpass round-trips
+overlap instead of queuing behind each other.
+
+Usage:
+    python scripts/prebake.py [path/to/localities.txt]
+"""
+import sys
+from pathlib import Path
+
+from src.graph.graph import get_graph
+from src.utils.result_store import save_prebaked_result
+
+DEFAULT_LOCALITIES = Path(__file__).parent / "popular_localities.txt"
+
+# Localities analysed concurrently; public Overpass servers grant each
+# client only a couple of query slots, so more would just queue there
+PREBAKE_CONCURRENCY = 2
+
+
+def read_localities(path: Path) -> list:
+    """Read one location per line, skipping blanks and # comments."""
+    lines = (line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOCALITIES
+    graph = get_graph()
+    
+    localities = read_localities(path)
+    results = graph.batch(
+        [{"user_input": location, "user_profile": None} for location in localities],
+        config={"max_concurrency": PREBAKE_CONCURRENCY},
+        return_exceptions=True
+    )
+    
+    for location, result in zip(localities, results):
+        if isinstance(result, Exception):
+            print(f"❌ {location}: {result}")
+            continue
+        
+        if result.get("errors"):
+            print(f"❌ {location}: {'; '.join(result['errors'])}")
+            continue
+        
+        saved_to = save_prebaked_result(location, result)
+        print(f"✅ {location} -> {saved_to}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Metrics catalog for Locality Lens.
 Defines all available metrics that can be calculated, along with metadata
 for LLM-driven metric selection based on user profile.
 """
+from functools import lru_cache
 from typing import Dict, List, Any
 
 # ============================================================================
@@ -536,20 +537,22 @@ def get_all_metrics() -> List[str]:
     return list(METRICS_CATALOG.keys())
 
 
+# Inverted indices over the (static) catalog, built once at import
+_METRICS_BY_CATEGORY: Dict[str, List[str]] = {}
+_METRICS_BY_COST: Dict[str, List[str]] = {}
+for _key, _value in METRICS_CATALOG.items():
+    _METRICS_BY_CATEGORY.setdefault(_value.get("category"), []).append(_key)
+    _METRICS_BY_COST.setdefault(_value.get("calculation_cost"), []).append(_key)
+
+
 def get_metrics_by_category(category: str) -> List[str]:
     """Get metrics filtered by category."""
-    return [
-        key for key, value in METRICS_CATALOG.items()
-        if value.get("category") == category
-    ]
+    return list(_METRICS_BY_CATEGORY.get(category, ()))
 
 
 def get_metrics_by_cost(cost: str) -> List[str]:
     """Get metrics filtered by calculation cost (low, medium, high)."""
-    return [
-        key for key, value in METRICS_CATALOG.items()
-        if value.get("calculation_cost") == cost
-    ]
+    return list(_METRICS_BY_COST.get(cost, ()))
 
 
 def get_default_metrics_for_profile(profile: str) -> List[str]:
@@ -562,21 +565,32 @@ def get_default_metrics_for_profile(profile: str) -> List[str]:
     Returns:
         List of metric keys
     """
+    # Copy so callers can't mutate the shared defaults
+    return list(PROFILE_DEFAULT_METRICS[_resolve_profile_key(profile)])
+
+
+# Lowercased profile keys, in catalog order, for fuzzy matching
+_PROFILE_KEYS_LOWER = [(key.lower(), key) for key in PROFILE_DEFAULT_METRICS]
+
+
+@lru_cache(maxsize=64)
+def _resolve_profile_key(profile: str) -> str:
+    """Map a profile string to its PROFILE_DEFAULT_METRICS key (cached)."""
     # Normalize profile name
     profile_normalized = profile.strip()
     
     # Direct match
     if profile_normalized in PROFILE_DEFAULT_METRICS:
-        return PROFILE_DEFAULT_METRICS[profile_normalized]
+        return profile_normalized
     
     # Fuzzy matching for variations
     profile_lower = profile_normalized.lower()
-    for key, metrics in PROFILE_DEFAULT_METRICS.items():
-        if profile_lower in key.lower() or key.lower() in profile_lower:
-            return metrics
+    for key_lower, key in _PROFILE_KEYS_LOWER:
+        if profile_lower in key_lower or key_lower in profile_lower:
+            return key
     
     # Default fallback
-    return PROFILE_DEFAULT_METRICS["Custom"]
+    return "Custom"
 
 
 def get_metric_info(metric_key: str) -> Dict[str, Any]:
@@ -614,25 +628,28 @@ def validate_metrics(metric_keys: List[str]) -> tuple[List[str], List[str]]:
     return valid, invalid
 
 
+@lru_cache(maxsize=1)
 def get_metrics_for_llm_selection() -> str:
     """
     Format metrics catalog for LLM prompt - MINIMAL VERSION.
     
     Only includes essential information for metric selection.
     Excludes implementation details to prevent hallucination.
+    The display name is left out: the snake_case key already spells it,
+    and every prompt token adds LLM latency.
+    The catalog is static, so the string is built once and cached.
     
     Returns:
         Compact string format
     """
     lines = []
     for key, info in METRICS_CATALOG.items():
-        name = info.get("name", key)
-        description = info.get("description", "")
+        description = info.get("description") or info.get("name", key)
         # Top 3 keywords only - most relevant for matching
         # keywords = ", ".join(info.get("keywords", [])[:3])
         
         lines.append(
-            f"{key}: {name} - {description}"
+            f"{key}: {description}"
         )
     return "\n".join(lines)
 
@@ -1,15 +1,23 @@
 """
 OSM data fetching and processing utilities.
 """
+import hashlib
 import os
 import ssl
+import tempfile
+import threading
+import time
 import warnings
+from collections import OrderedDict
+from pathlib import Path
 import numpy as np
 import geopandas as gpd
 import pandas as pd
-from scipy.spatial import cKDTree
+import shapely
 import osmnx as ox
 
+from src.analysis.metrics_catalog import METRICS_CATALOG
+
 # SSL Configuration (for corporate proxies)
 ssl._create_default_https_context = ssl._create_unverified_context
 os.environ['PYTHONHTTPSVERIFY'] = '0'
@@ -25,34 +33,45 @@ ox.settings.use_cache = True
 ox.settings.timeout = 300
 
 
-def determine_poi_type(row):
+# Tag keys consulted for poi_type, highest priority first
+POI_TAG_PRIORITY = ["amenity", "leisure", "shop", "highway", "railway", "tourism"]
+
+
+def determine_poi_type(df):
     """
-    Determine POI type from OSM tags.
+    Determine POI types from OSM tags for a whole frame.
     
-    Returns just the value (e.g., "restaurant", "park", "school").
+    Returns just the values (e.g., "restaurant", "park", "school").
     Uses priority order: amenity > leisure > shop > highway > railway > tourism
     
+    Works column-wise: walking the tags from lowest to highest priority,
+    each tag's non-empty values overwrite the result, so the highest
+    priority tag present wins without a per-row Python call.
+    
     Args:
-        row: DataFrame row with OSM tags
+        df: DataFrame with OSM tag columns
         
     Returns:
-        POI type value or np.nan
+        Categorical Series of POI type values (NaN where no tag is set)
     """
-    tag_priority = ["amenity", "leisure", "shop", "highway", "railway", "tourism"]
+    result = pd.Series(np.nan, index=df.index, dtype=object)
     
-    for tag_key in tag_priority:
-        value = row.get(tag_key)
-        if pd.notna(value) and value != '':
-            return value  # Return just the value, not "tag_key_value"
+    for tag_key in reversed(POI_TAG_PRIORITY):
+        if tag_key not in df.columns:
+            continue
+        values = df[tag_key]
+        result = values.where(values.notna() & (values != ''), result)
     
-    return np.nan
+    # A few dozen distinct types over thousands of rows: as a Categorical
+    # the many poi_type comparisons downstream run on small integer codes
+    return result.astype('category')
 
 
 def deduplicate_pois(gdf, distance_m=200):
     """
     Fast deduplication: same name + poi_type within distance_m.
     
-    Uses spatial indexing (KDTree) for O(n log n) performance.
+    Uses a single bulk-loaded spatial index (STRtree) for O(n log n) performance.
     KEEPS FIRST occurrence, drops subsequent duplicates.
     
     Args:
@@ -65,80 +84,132 @@ def deduplicate_pois(gdf, distance_m=200):
     if gdf.empty:
         return gdf
     
-    # Validate geometries first
-    gdf = gdf[
-        gdf.geometry.notna() & 
-        gdf.geometry.is_valid &
-        ~gdf.geometry.is_empty
-    ].copy().reset_index(drop=True)
+    # Validate geometries and drop features with missing name (as per
+    # notebook approach); rows are only selected once, at the end.
+    # shapely.is_valid is False for missing geometries, so two GEOS
+    # ufunc passes over the geometry array cover all three checks
+    geometry = gdf.geometry
+    geoms = geometry.to_numpy()
+    valid = (
+        shapely.is_valid(geoms) &
+        ~shapely.is_empty(geoms) &
+        gdf['name'].notna().to_numpy()
+    )
+    positions = np.flatnonzero(valid)
     
     # Create poi_type if not exists
-    if 'poi_type' not in gdf.columns:
-        gdf['poi_type'] = gdf.apply(determine_poi_type, axis=1)
+    if 'poi_type' in gdf.columns:
+        poi_types = gdf['poi_type']
+    else:
+        poi_types = determine_poi_type(gdf)
     
-    # Drop features with missing name (as per notebook approach)
-    # Keep only features with names for deduplication
-    gdf = gdf.dropna(subset=['name']).reset_index(drop=True)
+    # Deduplication key: name + poi_type, packed into one int64 from the
+    # factorized codes (no per-row string building); NaN types group together
+    name_codes, _ = pd.factorize(gdf['name'].iloc[positions], use_na_sentinel=False)
+    type_codes, _ = pd.factorize(poi_types.iloc[positions], use_na_sentinel=False)
+    keys = (name_codes.astype(np.int64) << 32) | type_codes.astype(np.int64)
     
-    if gdf.empty:
-        return gdf
+    keep = np.ones(len(positions), dtype=bool)
     
-    # Create deduplication key: name + poi_type
-    gdf['name_poi_key'] = (
-        gdf['name'].astype(str) + '_' + 
-        gdf['poi_type'].astype(str)
-    )
-    
-    # Get centroid coordinates for distance calculation
-    centroids = gdf.geometry.centroid
-    gdf['centroid_x'] = centroids.x
-    gdf['centroid_y'] = centroids.y
-    
-    to_drop = set()
-    
-    # Group by name_poi_key - only check duplicates within same group
-    for name_poi, group in gdf.groupby('name_poi_key'):
-        if len(group) == 1:
-            continue  # No duplicates possible
-        
-        # Extract coordinates for this group
-        coords = np.column_stack([group['centroid_x'].values, group['centroid_y'].values])
-        
-        # Scale to meters for accurate distance calculation
-        # This accounts for latitude (longitude degrees vary by latitude)
-        avg_lat = coords[:, 1].mean()  # y is latitude
-        lat_scale = 111000  # meters per degree latitude
-        lon_scale = 111000 * np.cos(np.radians(avg_lat))  # meters per degree longitude
+    if len(positions) > 1:
+        # Bounding-box centers in the local UTM zone, so distances are in
+        # meters. For POI-sized footprints the box center is within a few
+        # meters of the true centroid, well inside the dedup tolerance, and
+        # shapely.bounds is a single cheap ufunc pass
+        valid_geometry = geometry.iloc[positions]
+        utm_crs = valid_geometry.estimate_utm_crs()
+        bounds = shapely.bounds(valid_geometry.to_crs(utm_crs).to_numpy())
+        centers = shapely.points(
+            (bounds[:, 0] + bounds[:, 2]) * 0.5,
+            (bounds[:, 1] + bounds[:, 3]) * 0.5
+        )
         
-        coords_scaled = coords.copy()
-        coords_scaled[:, 0] *= lon_scale  # x is longitude
-        coords_scaled[:, 1] *= lat_scale  # y is latitude
+        # One bulk-loaded STRtree over all POIs; find every pair within
+        # distance_m, then keep only pairs that share a key
+        tree = shapely.STRtree(centers)
+        left, right = tree.query(centers, predicate='dwithin', distance=distance_m)
+        mask = (left < right) & (keys[left] == keys[right])
         
-        # Build spatial index
-        tree = cKDTree(coords_scaled)
-        
-        # Find all pairs within distance_m (in meters)
-        pairs = tree.query_pairs(distance_m, output_type='ndarray')
-        
-        if len(pairs) > 0:
-            # IMPORTANT: pairs[:, 0] = first occurrence (KEEP)
-            #            pairs[:, 1] = subsequent occurrence (DROP)
-            # This ensures we keep one value per duplicate group
-            indices_to_drop = group.iloc[pairs[:, 1]].index.tolist()
-            to_drop.update(indices_to_drop)
-    
-    # Drop duplicates and clean up helper columns
-    result = gdf.drop(index=list(to_drop)).drop(
-        columns=['name_poi_key', 'centroid_x', 'centroid_y']
-    ).reset_index(drop=True)
+        # IMPORTANT: with left < right,
+        #            left  = first occurrence (KEEP)
+        #            right = subsequent occurrence (DROP)
+        # This ensures we keep one value per duplicate group
+        keep[right[mask]] = False
+    
+    # Single selection from the input frame: valid, non-duplicate rows
+    kept = positions[keep]
+    result = gdf.iloc[kept]
+    if 'poi_type' not in result.columns:
+        result = result.assign(poi_type=poi_types.iloc[kept].array)
+    result.index = pd.RangeIndex(len(result))
     
     return result
 
 
+# Rounding precision for the fetch cache key (4 decimals ~ 11m), so nearby
+# lookups of the same locality share one Overpass round-trip
+OSM_CACHE_PRECISION = 4
+
+# Processed feature frames are also kept on disk as Parquet, next to the
+# OSMnx HTTP cache, so a restart skips re-parsing the Overpass response
+OSM_PARQUET_DIR = Path(__file__).resolve().parents[2] / "cache" / "osm_features"
+
+# Parquet entries older than this are refetched (OSM data changes slowly)
+OSM_PARQUET_MAX_AGE_S = 7 * 24 * 60 * 60
+
+# In-process cache in front of Parquet: a few full GeoDataFrames at most,
+# each expiring with the same max age as its on-disk copy
+OSM_MEMORY_CACHE_SIZE = 16
+_FEATURES_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_FEATURES_CACHE_LOCK = threading.Lock()
+
+
+def _catalog_tag_values(tag_key):
+    """Sorted OSM values of tag_key referenced by any metric's osmtag."""
+    values = set()
+    for metric in METRICS_CATALOG.values():
+        value = metric.get("osmtag", {}).get(tag_key)
+        if isinstance(value, str):
+            values.add(value)
+        elif isinstance(value, list):
+            values.update(value)
+    return sorted(values)
+
+
+# Public Overpass instances grant each client about two query slots; more
+# concurrent queries from this process (parallel sessions, prebake batches)
+# only earn 429s, so they queue here instead
+OVERPASS_MAX_CONCURRENT = 2
+_OVERPASS_SLOTS = threading.BoundedSemaphore(OVERPASS_MAX_CONCURRENT)
+
+OSM_TAGS = {
+    # Fetch only the amenities the metrics catalog consumes; other values
+    # never reach a category and only inflated the Overpass response
+    'amenity': _catalog_tag_values('amenity'),
+    
+    # Same for leisure
+    'leisure': _catalog_tag_values('leisure'),
+    
+    # Fetch all shops
+    'shop': True,
+    
+    # Fetch specific transportation (standardized)
+    'highway': ['bus_stop'],
+    'railway': ['station', 'subway', 'subway_entrance', 'platform', 'light_rail', 'tram'],
+    
+    # Fetch specific tourism
+    'tourism': ['hotel', 'hostel', 'guest_house', 'artwork', 'attraction'],
+}
+
+
 def fetch_osm_features(location_point, radius_m=2000):
     """
     Fetch OSM features with comprehensive tags.
     
+    All tag groups go out as a single Overpass union query. Results are cached
+    in-process per rounded point and radius, and on disk as Parquet; both
+    layers expire after OSM_PARQUET_MAX_AGE_S.
+    
     Args:
         location_point: (lat, lon) tuple
         radius_m: Search radius in meters
@@ -146,31 +217,88 @@ def fetch_osm_features(location_point, radius_m=2000):
     Returns:
         GeoDataFrame with all features and 'poi_type' column
     """
-    tags = {
-        # Fetch all amenities (catch regional variations)
-        'amenity': True,
-        
-        # Fetch all leisure (catch variations)
-        'leisure': True,
-        
-        # Fetch all shops
-        'shop': True,
-        
-        # Fetch specific transportation (standardized)
-        'highway': ['bus_stop'],
-        'railway': ['station', 'subway', 'subway_entrance', 'platform', 'light_rail', 'tram'],
-        
-        # Fetch specific tourism
-        'tourism': ['hotel', 'hostel', 'guest_house', 'artwork', 'attraction'],
-    }
-    
-    all_features = ox.features_from_point(
-        center_point=location_point,
-        dist=radius_m,
-        tags=tags
+    lat, lon = location_point
+    features = _fetch_osm_features_cached(
+        round(lat, OSM_CACHE_PRECISION),
+        round(lon, OSM_CACHE_PRECISION),
+        radius_m
     )
+    # Callers add columns / drop rows; keep the cached frame pristine
+    return features.copy()
+
+
+def _parquet_cache_path(lat, lon, radius_m):
+    """Parquet file for a rounded point, radius and the current OSM_TAGS."""
+    key = repr((lat, lon, radius_m, sorted(OSM_TAGS.items())))
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return OSM_PARQUET_DIR / f"{digest}.parquet"
+
+
+def _fetch_osm_features_cached(lat, lon, radius_m):
+    """
+    Fetch and type OSM features for a rounded point (cached).
+    
+    Entries are kept in a small in-process LRU and expire once the data is
+    older than OSM_PARQUET_MAX_AGE_S, counted from when it was fetched (the
+    Parquet file's mtime when loaded from disk).
+    """
+    key = (lat, lon, radius_m)
+    with _FEATURES_CACHE_LOCK:
+        entry = _FEATURES_CACHE.get(key)
+        if entry is not None and time.time() - entry[0] <= OSM_PARQUET_MAX_AGE_S:
+            _FEATURES_CACHE.move_to_end(key)
+            return entry[1]
+    
+    fetched_at, features = _load_or_fetch_osm_features(lat, lon, radius_m)
+    
+    with _FEATURES_CACHE_LOCK:
+        _FEATURES_CACHE[key] = (fetched_at, features)
+        _FEATURES_CACHE.move_to_end(key)
+        while len(_FEATURES_CACHE) > OSM_MEMORY_CACHE_SIZE:
+            _FEATURES_CACHE.popitem(last=False)
+    
+    return features
+
+
+def _load_or_fetch_osm_features(lat, lon, radius_m):
+    """Load features from the Parquet cache or Overpass; returns (fetched_at, gdf)."""
+    path = _parquet_cache_path(lat, lon, radius_m)
+    try:
+        mtime = path.stat().st_mtime
+        if time.time() - mtime <= OSM_PARQUET_MAX_AGE_S:
+            return mtime, gpd.read_parquet(path)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # Unreadable entry (e.g. truncated by an older writer): drop and refetch
+        path.unlink(missing_ok=True)
+    
+    # One features_from_point call = one Overpass request for every tag group
+    with _OVERPASS_SLOTS:
+        all_features = ox.features_from_point(
+            center_point=(lat, lon),
+            dist=radius_m,
+            tags=OSM_TAGS
+        )
+    
+    fetched_at = time.time()
     
     # Create poi_type column
-    all_features['poi_type'] = all_features.apply(determine_poi_type, axis=1)
+    all_features['poi_type'] = determine_poi_type(all_features)
+    
+    # Best effort: a frame Arrow cannot encode (e.g. a mixed-type tag
+    # column) just isn't cached on disk. Written to a unique temp file and
+    # renamed into place, so readers never see a partial file even when a
+    # process dies mid-write or two threads fetch the same point
+    tmp_path = None
+    try:
+        OSM_PARQUET_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=OSM_PARQUET_DIR, suffix=".parquet.tmp")
+        os.close(fd)
+        all_features.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if tmp_path:
+            Path(tmp_path).unlink(missing_ok=True)
     
-    return all_features
\ No newline at end of file
+    return fetched_at, all_features
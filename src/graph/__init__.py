@@ -2,6 +2,6 @@
 LangGraph workflow for Locality Lens.
 """
 from .state import LocalityState
-from .graph import create_graph, compile_graph
+from .graph import create_graph, compile_graph, get_graph
 
-__all__ = ["LocalityState", "create_graph", "compile_graph"]
\ No newline at end of file
+__all__ = ["LocalityState", "create_graph", "compile_graph", "get_graph"]
\ No newline at end of file
@@ -6,15 +6,35 @@ from langgraph.graph import StateGraph, END
 from .state import LocalityState
 from .nodes import (
     validate_input,
-    geocode_location,
+    locate_and_fetch,
     extract_intent_and_select_metrics,
-    fetch_osm_data,
     calculate_statistics,
     handle_error,
     generate_summary,
 )
 
 
+# ============================================================================
+# ROUTING FUNCTIONS
+# ============================================================================
+# Defined once at module scope rather than re-created by every create_graph()
+
+def route_after_validate(state: LocalityState) -> str | list[str]:
+    """Route based on validation result."""
+    if state.get("errors"):
+        return "error"
+    # Intent extraction doesn't need coordinates, so run it in the same
+    # superstep as the geocode + OSM fetch branch instead of in front of it
+    return ["intent", "locate"]
+
+
+def route_after_calculate(state: LocalityState) -> str:
+    """Route after statistics calculation"""
+    if state.get("errors"):
+        return "error"
+    return "generate_summary"
+
+
 def create_graph() -> StateGraph:
     """
     Create and configure the Locality Lens workflow graph.
@@ -28,8 +48,9 @@ def create_graph() -> StateGraph:
     # Add nodes
     graph.add_node("validate_input", validate_input)
     graph.add_node("extract_intent_and_select_metrics", extract_intent_and_select_metrics)
-    graph.add_node("geocode_location", geocode_location)
-    graph.add_node("fetch_osm_data", fetch_osm_data)
+    # Geocoding and the OSM fetch share one node: as separate nodes, the
+    # fetch would sit in a later superstep and wait for the intent LLM call
+    graph.add_node("locate_and_fetch", locate_and_fetch)
     graph.add_node("calculate_statistics", calculate_statistics)
     graph.add_node("generate_summary", generate_summary)
     graph.add_node("handle_error", handle_error)
@@ -38,111 +59,28 @@ def create_graph() -> StateGraph:
     graph.set_entry_point("validate_input")
     
     # ========================================================================
-    # ROUTING AFTER VALIDATION
+    # ROUTING AFTER VALIDATION: Fan out
     # ========================================================================
-    def route_after_validate(state: LocalityState) -> str:
-        """Route based on validation result."""
-        if state.get("errors"):
-            return "error"
-        # Always start parallel execution after validation
-        return "parallel_start"
-    
     graph.add_conditional_edges(
         "validate_input",
         route_after_validate,
         {
             "error": "handle_error",
-            "parallel_start": "extract_intent_and_select_metrics"
-        }
-    )
-
-    # ========================================================================
-    # PARALLEL EXECUTION: Intent extraction + Geocoding/OSM fetch
-    # ========================================================================
-    # After intent extraction, route to geocoding or OSM fetch
-    def route_after_intent(state: LocalityState) -> str:
-        """Route after intent extraction - check if coordinates exist."""
-        if state.get("errors"):
-            return "error"
-        if state.get("coordinates"):
-            # Coordinates exist - go directly to OSM fetch
-            return "fetch_osm"
-        # Need geocoding
-        return "geocode"
-    
-    graph.add_conditional_edges(
-        "extract_intent_and_select_metrics",
-        route_after_intent,
-        {
-            "error": "handle_error",
-            "fetch_osm": "fetch_osm_data",  # Parallel path 1: OSM fetch
-            "geocode": "geocode_location"    # Parallel path 2: Geocoding
-        }
-    )
-    
-    
-    # ========================================================================
-    # AFTER GEOCODING: Fetch OSM data
-    # ========================================================================
-    def route_after_geocode(state: LocalityState) -> str:
-        """Route after geocoding."""
-        if state.get("errors"):
-            return "error"
-        if state.get("coordinates"):
-            return "fetch_osm"
-        return "error"
-    
-    graph.add_conditional_edges(
-        "geocode_location",
-        route_after_geocode,
-        {
-            "error": "handle_error",
-            "fetch_osm": "fetch_osm_data"
+            "intent": "extract_intent_and_select_metrics",  # Parallel path 1: LLM
+            "locate": "locate_and_fetch"                    # Parallel path 2: Geocoding -> OSM
         }
     )
     
     # ========================================================================
-    # AFTER OSM FETCH: Calculate statistics (needs both OSM data + selected_metrics)
+    # FAN IN: Calculate statistics (needs both OSM data + selected_metrics)
     # ========================================================================
-    def route_after_fetch(state: LocalityState) -> str:
-        """Route after OSM fetch - ensure both OSM data and selected_metrics exist."""
-        if state.get("errors"):
-            return "error"
-        
-        # Check if both required data is available
-        osm_data = state.get("osm_data", {})
-        selected_metrics = state.get("selected_metrics", [])
-        
-        if not osm_data:
-            return "error"
-        
-        # If no metrics selected yet, wait or use defaults
-        if not selected_metrics:
-            # Intent extraction might still be running - this shouldn't happen
-            # but handle gracefully
-            from src.analysis.metrics_catalog import get_default_metrics_for_profile
-            state["selected_metrics"] = get_default_metrics_for_profile("general")
-        
-        return "calculate"
-    
-    graph.add_conditional_edges(
-        "fetch_osm_data",
-        route_after_fetch,
-        {
-            "error": "handle_error",
-            "calculate": "calculate_statistics"
-        }
-    )
+    # calculate_statistics waits for both branches; geocoding and OSM fetch
+    # failures are surfaced there and routed to handle_error below
+    graph.add_edge(["extract_intent_and_select_metrics", "locate_and_fetch"], "calculate_statistics")
     
     # ========================================================================
     # AFTER CALCULATION: Generate summary
     # ========================================================================
-    def route_after_calculate(state: LocalityState) -> str:
-        """Route after statistics calculation"""
-        if state.get("errors"):
-            return "error"
-        return "generate_summary"
-    
     graph.add_conditional_edges(
         "calculate_statistics",
         route_after_calculate,
@@ -164,4 +102,22 @@ def compile_graph() -> StateGraph:
         Compiled graph ready to use
     """
     graph = create_graph()
-    return graph.compile()
\ No newline at end of file
+    return graph.compile()
+
+
+# Compiled graph shared by every caller in this process. The topology is
+# static, so it only needs to be built once.
+_GRAPH = None
+
+
+def get_graph() -> StateGraph:
+    """
+    Get the process-wide compiled graph, compiling it on first use.
+    
+    Returns:
+        Compiled graph ready to use
+    """
+    global _GRAPH
+    if _GRAPH is None:
+        _GRAPH = compile_graph()
+    return _GRAPH
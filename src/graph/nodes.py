@@ -1,16 +1,24 @@
 """
 Graph nodes for Locality Lens workflow.
 
-Each node is a function that takes state, performs work, and returns updated state.
+Each node is a function that takes state, performs work, and returns a partial
+state update. Nodes must not mutate the incoming state: intent extraction runs
+in parallel with the geocode + OSM fetch branch (locate_and_fetch), and list
+fields (errors, warnings, processing_steps) are merged by the reducers declared
+in LocalityState.
 """
 import os
 import ssl
 import json
+import threading
+import time
 import warnings
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, Optional
 from urllib.parse import quote, urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
 import urllib3
 import urllib3.poolmanager
 
@@ -79,6 +87,7 @@ requests.adapters.HTTPAdapter.send = _patched_adapter_send
 import osmnx as ox
 import geopandas as gpd
 from shapely.geometry import Point
+from langgraph.config import get_stream_writer
 
 # Configure OSMnx
 warnings.filterwarnings('ignore')
@@ -86,6 +95,70 @@ ox.settings.log_console = True
 ox.settings.use_cache = True
 ox.settings.timeout = 300
 
+# Shared HTTP session: keeps the TLS connection to Nominatim alive across
+# geocode calls instead of paying a fresh handshake per request. Pooled for
+# the parallel graph branches; connection errors and transient 5xx responses
+# are retried with backoff. 429 is not retried here: those retries would
+# bypass _wait_for_nominatim_slot(). Once retries run out the last response
+# is returned (raise_on_status=False), so its status is reported as usual
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=urllib3.util.Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    ),
+))
+
+# Nominatim's usage policy allows at most one request per second per
+# application; concurrent runs (parallel sessions, prebake batches) queue
+# here instead of collecting 429s
+NOMINATIM_MIN_INTERVAL_S = 1.0
+_NOMINATIM_LOCK = threading.Lock()
+_last_nominatim_request = 0.0
+
+
+def _wait_for_nominatim_slot():
+    """Block until NOMINATIM_MIN_INTERVAL_S has passed since the last request."""
+    global _last_nominatim_request
+    with _NOMINATIM_LOCK:
+        wait = _last_nominatim_request + NOMINATIM_MIN_INTERVAL_S - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_nominatim_request = time.monotonic()
+
+
+# Successful geocodes by normalized query -> (lat, lon, address). Repeat
+# lookups skip the Nominatim round-trip (and its 1 req/s usage policy);
+# failures are not cached since they may be transient. LRU, shared by the
+# parallel graph branches, prebake batches and Streamlit sessions, so every
+# access holds the lock
+GEOCODE_CACHE_SIZE = 4096
+_GEOCODE_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_GEOCODE_CACHE_LOCK = threading.Lock()
+
+
+def _cached_geocode(cache_key: str) -> Optional[tuple]:
+    """Return the cached (lat, lon, address) for a query, marking it recent."""
+    with _GEOCODE_CACHE_LOCK:
+        cached = _GEOCODE_CACHE.get(cache_key)
+        if cached is not None:
+            _GEOCODE_CACHE.move_to_end(cache_key)
+        return cached
+
+
+def _remember_geocode(cache_key: str, lat: float, lon: float, address: str):
+    """Cache a successful geocode, evicting the least recently used entry."""
+    with _GEOCODE_CACHE_LOCK:
+        _GEOCODE_CACHE[cache_key] = (lat, lon, address)
+        _GEOCODE_CACHE.move_to_end(cache_key)
+        while len(_GEOCODE_CACHE) > GEOCODE_CACHE_SIZE:
+            _GEOCODE_CACHE.popitem(last=False)
+
 from .state import LocalityState
 
 def validate_input(state: LocalityState) -> LocalityState:
@@ -97,10 +170,11 @@ def validate_input(state: LocalityState) -> LocalityState:
     user_input = state.get("user_input", "").strip()
     
     if not user_input:
-        state["errors"].append("User input is required")
-        state["next_action"] = "error"
-        state["processing_steps"].append("validate_input: FAILED - No input provided")
-        return state
+        return {
+            "errors": ["User input is required"],
+            "next_action": "error",
+            "processing_steps": ["validate_input: FAILED - No input provided"]
+        }
     
     # Check if input is already coordinates (format: "lat, lon" or "lat,lon")
     if "," in user_input:
@@ -112,18 +186,18 @@ def validate_input(state: LocalityState) -> LocalityState:
                 
                 # Validate coordinate ranges
                 if -90 <= lat <= 90 and -180 <= lon <= 180:
-                    state["coordinates"] = (lat, lon)
                     # Don't set next_action - let graph route handle it
-                    state["processing_steps"].append(f"validate_input: SUCCESS - Parsed coordinates ({lat}, {lon})")
-                    return state
+                    return {
+                        "coordinates": (lat, lon),
+                        "processing_steps": [f"validate_input: SUCCESS - Parsed coordinates ({lat}, {lon})"]
+                    }
         except ValueError:
             # Not coordinates, treat as address
             pass
     
     # Input is an address, needs geocoding
     # Don't set next_action - let graph route handle it
-    state["processing_steps"].append("validate_input: SUCCESS - Address detected, needs geocoding")
-    return state
+    return {"processing_steps": ["validate_input: SUCCESS - Address detected, needs geocoding"]}
 
 
 def geocode_location(state: LocalityState) -> LocalityState:
@@ -135,15 +209,26 @@ def geocode_location(state: LocalityState) -> LocalityState:
     """
     # Skip if coordinates already exist (from validate_input)
     if state.get("coordinates"):
-        state["processing_steps"].append("geocode_location: SKIPPED - Coordinates already exist")
-        return state
+        return {"processing_steps": ["geocode_location: SKIPPED - Coordinates already exist"]}
     
     user_input = state.get("user_input", "")
     
     if not user_input:
-        state["errors"].append("No input provided for geocoding")
-        state["next_action"] = "error"
-        return state
+        return {"errors": ["No input provided for geocoding"], "next_action": "error"}
+    
+    cache_key = " ".join(user_input.strip().lower().split())
+    cached = _cached_geocode(cache_key)
+    if cached:
+        lat, lon, address = cached
+        return {
+            "coordinates": (lat, lon),
+            "address": address,
+            "processing_steps": [f"geocode_location: SUCCESS - Geocoded to ({lat}, {lon}) (cached)"]
+        }
+    
+    updates = {}
+    errors = []
+    steps = []
     
     try:
         url = "https://nominatim.openstreetmap.org/search"
@@ -156,7 +241,8 @@ def geocode_location(state: LocalityState) -> LocalityState:
             'User-Agent': 'locality-lens'  # Required by Nominatim
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10, verify=False)
+        _wait_for_nominatim_slot()
+        response = _HTTP_SESSION.get(url, params=params, headers=headers, timeout=10, verify=False)
         
         if response.status_code == 200:
             data = response.json()
@@ -166,15 +252,16 @@ def geocode_location(state: LocalityState) -> LocalityState:
                 lon = float(location_data['lon'])
                 address = location_data.get('display_name', user_input)
                 
-                state["coordinates"] = (lat, lon)
-                state["address"] = address
-                state["processing_steps"].append(f"geocode_location: SUCCESS - Geocoded to ({lat}, {lon})")
+                updates["coordinates"] = (lat, lon)
+                updates["address"] = address
+                _remember_geocode(cache_key, lat, lon, address)
+                steps.append(f"geocode_location: SUCCESS - Geocoded to ({lat}, {lon})")
             else:
-                state["errors"].append(f"Could not geocode location: {user_input}")
-                state["processing_steps"].append(f"geocode_location: FAILED - No results for '{user_input}'")
+                errors.append(f"Could not geocode location: {user_input}")
+                steps.append(f"geocode_location: FAILED - No results for '{user_input}'")
         else:
-            state["errors"].append(f"Geocoding API returned status {response.status_code}")
-            state["processing_steps"].append(f"geocode_location: ERROR - API status {response.status_code}")
+            errors.append(f"Geocoding API returned status {response.status_code}")
+            steps.append(f"geocode_location: ERROR - API status {response.status_code}")
     
     except requests.exceptions.SSLError:
         # If SSL still fails, try with urllib3
@@ -183,6 +270,7 @@ def geocode_location(state: LocalityState) -> LocalityState:
             params = urlencode({'q': user_input, 'format': 'json', 'limit': 1})
             url = f"https://nominatim.openstreetmap.org/search?{params}"
             
+            _wait_for_nominatim_slot()
             response = http.request('GET', url, headers={'User-Agent': 'locality-lens'})
             
             if response.status == 200:
@@ -193,22 +281,25 @@ def geocode_location(state: LocalityState) -> LocalityState:
                     lon = float(location_data['lon'])
                     address = location_data.get('display_name', user_input)
                     
-                    state["coordinates"] = (lat, lon)
-                    state["address"] = address
-                    state["processing_steps"].append(f"geocode_location: SUCCESS - Geocoded to ({lat}, {lon}) via urllib3")
+                    updates["coordinates"] = (lat, lon)
+                    updates["address"] = address
+                    _remember_geocode(cache_key, lat, lon, address)
+                    steps.append(f"geocode_location: SUCCESS - Geocoded to ({lat}, {lon}) via urllib3")
                 else:
-                    state["errors"].append(f"Could not geocode location: {user_input}")
+                    errors.append(f"Could not geocode location: {user_input}")
             else:
-                state["errors"].append(f"Geocoding failed with status {response.status}")
+                errors.append(f"Geocoding failed with status {response.status}")
         except Exception as urllib_error:
-            state["errors"].append(f"Geocoding failed: {str(urllib_error)}")
-            state["processing_steps"].append(f"geocode_location: ERROR - {str(urllib_error)}")
+            errors.append(f"Geocoding failed: {str(urllib_error)}")
+            steps.append(f"geocode_location: ERROR - {str(urllib_error)}")
     
     except Exception as e:
-        state["errors"].append(f"Unexpected error during geocoding: {str(e)}")
-        state["processing_steps"].append(f"geocode_location: ERROR - {str(e)}")
+        errors.append(f"Unexpected error during geocoding: {str(e)}")
+        steps.append(f"geocode_location: ERROR - {str(e)}")
     
-    return state
+    updates["errors"] = errors
+    updates["processing_steps"] = steps
+    return updates
 
 
 def fetch_osm_data(state: LocalityState) -> LocalityState:
@@ -220,9 +311,7 @@ def fetch_osm_data(state: LocalityState) -> LocalityState:
     coordinates = state.get("coordinates")
     
     if not coordinates:
-        state["errors"].append("No coordinates available for OSM data fetching")
-        state["next_action"] = "error"
-        return state
+        return {"errors": ["No coordinates available for OSM data fetching"], "next_action": "error"}
     
     lat, lon = coordinates
     location_point = (lat, lon)
@@ -240,19 +329,70 @@ def fetch_osm_data(state: LocalityState) -> LocalityState:
         # Step 3: Classify into categories
         osm_data = classify_pois_to_categories(cleaned_features)
         
-        state["osm_data"] = osm_data
-        state["next_action"] = "select_metrics"
-        state["processing_steps"].append(
-            f"fetch_osm_data: SUCCESS - Fetched {len(all_features)} features, "
-            f"cleaned to {len(cleaned_features)}, classified into {len(osm_data)} categories"
-        )
+        return {
+            "osm_data": osm_data,
+            "next_action": "select_metrics",
+            "processing_steps": [
+                f"fetch_osm_data: SUCCESS - Fetched {len(all_features)} features, "
+                f"cleaned to {len(cleaned_features)}, classified into {len(osm_data)} categories"
+            ]
+        }
         
     except Exception as e:
-        state["errors"].append(f"Error fetching OSM data: {str(e)}")
-        state["next_action"] = "error"
-        state["processing_steps"].append(f"fetch_osm_data: ERROR - {str(e)}")
+        return {
+            "errors": [f"Error fetching OSM data: {str(e)}"],
+            "next_action": "error",
+            "processing_steps": [f"fetch_osm_data: ERROR - {str(e)}"]
+        }
+
+
+def locate_and_fetch(state: LocalityState) -> LocalityState:
+    """
+    Geocode the location, then fetch its OSM data, as one graph node.
+    
+    LangGraph runs nodes in supersteps: a separate fetch node after geocoding
+    would only start once every node of the previous superstep, including
+    the intent LLM call, had returned. As one node, the fetch starts as soon
+    as geocoding does, so the whole branch overlaps with intent extraction.
+    
+    Emits {"completed": "geocode_location"} on the custom stream when
+    geocoding finishes, so the UI can report the two steps separately.
+    """
+    geocoded = geocode_location(state)
+    get_stream_writer()({"completed": "geocode_location"})
+    
+    if geocoded.get("errors"):
+        return geocoded
+    
+    fetched = fetch_osm_data({**state, **geocoded})
+    
+    # Reducer fields are concatenated; everything else comes from the fetch
+    updates = {**geocoded, **fetched}
+    for key in ("errors", "warnings", "processing_steps"):
+        if key in updates:
+            updates[key] = geocoded.get(key, []) + fetched.get(key, [])
+    return updates
+
+
+# Max POI locations kept per category (enough for the map markers)
+MAX_POI_POINTS = 10
+
+
+def _poi_points(pois) -> Dict[str, list]:
+    """
+    Columnar sample of a category's POI locations for the map.
     
-    return state
+    Stored as parallel lists (lats/lons/names) rather than one dict per POI,
+    so the map zips them directly without per-marker lookups.
+    """
+    sample = pois.head(MAX_POI_POINTS)
+    # representative_point() is guaranteed to lie inside polygons (parks etc.)
+    points = sample.geometry.representative_point()
+    return {
+        "lats": points.y.tolist(),
+        "lons": points.x.tolist(),
+        "names": sample["name"].astype(str).tolist()
+    }
 
 
 def classify_pois_to_categories(gdf):
@@ -279,87 +419,87 @@ def classify_pois_to_categories(gdf):
     # Schools
     schools = gdf[gdf['poi_type'] == 'school']
     if not schools.empty:
-        osm_data["schools"] = {"count": len(schools), "data": []}
+        osm_data["schools"] = {"count": len(schools), "points": _poi_points(schools)}
     
     # Hospitals & Clinics
     hospitals = gdf[gdf['poi_type'].isin(['hospital', 'clinic', 'doctors', 'dentist'])]
     if not hospitals.empty:
-        osm_data["hospitals"] = {"count": len(hospitals), "data": []}
+        osm_data["hospitals"] = {"count": len(hospitals), "points": _poi_points(hospitals)}
     
     # Restaurants (combined)
     restaurants = gdf[gdf['poi_type'].isin(['restaurant', 'cafe', 'fast_food', 'food_court'])]
     if not restaurants.empty:
-        osm_data["restaurants"] = {"count": len(restaurants), "data": []}
+        osm_data["restaurants"] = {"count": len(restaurants), "points": _poi_points(restaurants)}
     
     # Cafes (separate)
     cafes = gdf[gdf['poi_type'] == 'cafe']
     if not cafes.empty:
-        osm_data["cafes"] = {"count": len(cafes), "data": []}
+        osm_data["cafes"] = {"count": len(cafes), "points": _poi_points(cafes)}
     
     # Fast food (separate)
     fast_food = gdf[gdf['poi_type'] == 'fast_food']
     if not fast_food.empty:
-        osm_data["fast_food"] = {"count": len(fast_food), "data": []}
+        osm_data["fast_food"] = {"count": len(fast_food), "points": _poi_points(fast_food)}
     
     # Banks & ATMs
     banks = gdf[gdf['poi_type'].isin(['bank', 'atm'])]
     if not banks.empty:
-        osm_data["banks"] = {"count": len(banks), "data": []}
+        osm_data["banks"] = {"count": len(banks), "points": _poi_points(banks)}
     
     # Pharmacies
     pharmacies = gdf[gdf['poi_type'] == 'pharmacy']
     if not pharmacies.empty:
-        osm_data["pharmacies"] = {"count": len(pharmacies), "data": []}
+        osm_data["pharmacies"] = {"count": len(pharmacies), "points": _poi_points(pharmacies)}
     
     # Gyms & Fitness (check both amenity and leisure values)
     gyms = gdf[gdf['poi_type'].isin(['gym', 'fitness_centre'])]
     if not gyms.empty:
-        osm_data["gyms"] = {"count": len(gyms), "data": []}
+        osm_data["gyms"] = {"count": len(gyms), "points": _poi_points(gyms)}
     
     # Libraries
     libraries = gdf[gdf['poi_type'] == 'library']
     if not libraries.empty:
-        osm_data["libraries"] = {"count": len(libraries), "data": []}
+        osm_data["libraries"] = {"count": len(libraries), "points": _poi_points(libraries)}
     
     # Places of worship
     worship = gdf[gdf['poi_type'] == 'place_of_worship']
     if not worship.empty:
-        osm_data["worship"] = {"count": len(worship), "data": []}
+        osm_data["worship"] = {"count": len(worship), "points": _poi_points(worship)}
     
     # Nightlife
     nightlife = gdf[gdf['poi_type'].isin(['bar', 'pub', 'nightclub'])]
     if not nightlife.empty:
-        osm_data["nightlife"] = {"count": len(nightlife), "data": []}
+        osm_data["nightlife"] = {"count": len(nightlife), "points": _poi_points(nightlife)}
     
     # Cinemas
     cinemas = gdf[gdf['poi_type'] == 'cinema']
     if not cinemas.empty:
-        osm_data["cinemas"] = {"count": len(cinemas), "data": []}
+        osm_data["cinemas"] = {"count": len(cinemas), "points": _poi_points(cinemas)}
     
     # Universities & Colleges
     universities = gdf[gdf['poi_type'].isin(['university', 'college'])]
     if not universities.empty:
-        osm_data["universities"] = {"count": len(universities), "data": []}
+        osm_data["universities"] = {"count": len(universities), "points": _poi_points(universities)}
     
     # Kindergartens
     kindergartens = gdf[gdf['poi_type'] == 'kindergarten']
     if not kindergartens.empty:
-        osm_data["kindergartens"] = {"count": len(kindergartens), "data": []}
+        osm_data["kindergartens"] = {"count": len(kindergartens), "points": _poi_points(kindergartens)}
     
     # Childcare
     childcare = gdf[gdf['poi_type'] == 'childcare']
     if not childcare.empty:
-        osm_data["childcare"] = {"count": len(childcare), "data": []}
+        osm_data["childcare"] = {"count": len(childcare), "points": _poi_points(childcare)}
     
     # Tuition centres
     tuition = gdf[gdf['poi_type'] == 'tuition']
     if not tuition.empty:
-        osm_data["tuition"] = {"count": len(tuition), "data": []}
+        osm_data["tuition"] = {"count": len(tuition), "points": _poi_points(tuition)}
     
     # Community centres
     community = gdf[gdf['poi_type'] == 'community_centre']
     if not community.empty:
-        osm_data["community"] = {"count": len(community), "data": []}
+        osm_data["community"] = {"count": len(community), "points": _poi_points(community)}
     
     # Parks (calculate area for polygons)
     parks = gdf[gdf['poi_type'].isin(['park', 'garden', 'recreation_ground'])]
@@ -376,45 +516,45 @@ def classify_pois_to_categories(gdf):
         osm_data["parks"] = {
             "count": len(parks),
             "area_km2": round(area_km2, 2),
-            "data": []
+            "points": _poi_points(parks)
         }
     
     # Playgrounds
     playgrounds = gdf[gdf['poi_type'] == 'playground']
     if not playgrounds.empty:
-        osm_data["playgrounds"] = {"count": len(playgrounds), "data": []}
+        osm_data["playgrounds"] = {"count": len(playgrounds), "points": _poi_points(playgrounds)}
     
     # Sports facilities
     sports = gdf[gdf['poi_type'] == 'sports_centre']
     if not sports.empty:
-        osm_data["sports"] = {"count": len(sports), "data": []}
+        osm_data["sports"] = {"count": len(sports), "points": _poi_points(sports)}
     
     # Metro stations (check all railway types)
     metro = gdf[gdf['poi_type'].isin(['station', 'subway', 'subway_entrance', 'platform'])]
     if not metro.empty:
-        osm_data["metro_stations"] = {"count": len(metro), "data": []}
+        osm_data["metro_stations"] = {"count": len(metro), "points": _poi_points(metro)}
     
     # Bus stops
     bus_stops = gdf[gdf['poi_type'] == 'bus_stop']
     if not bus_stops.empty:
-        osm_data["bus_stops"] = {"count": len(bus_stops), "data": []}
+        osm_data["bus_stops"] = {"count": len(bus_stops), "points": _poi_points(bus_stops)}
     
     # Shops - check original shop column (since poi_type is just the value)
     if 'shop' in gdf.columns:
         shops = gdf[gdf['shop'].notna()]
         if not shops.empty:
-            osm_data["shops"] = {"count": len(shops), "data": []}
+            osm_data["shops"] = {"count": len(shops), "points": _poi_points(shops)}
     
     # Hotels
     hotels = gdf[gdf['poi_type'].isin(['hotel', 'hostel', 'guest_house'])]
     if not hotels.empty:
-        osm_data["hotels"] = {"count": len(hotels), "data": []}
+        osm_data["hotels"] = {"count": len(hotels), "points": _poi_points(hotels)}
     
     # Residential buildings (check original building column)
     if 'building' in gdf.columns:
         residential = gdf[gdf['building'] == 'residential']
         if not residential.empty:
-            osm_data["residential_buildings"] = {"count": len(residential), "data": []}
+            osm_data["residential_buildings"] = {"count": len(residential), "points": _poi_points(residential)}
     
     return osm_data
 
@@ -423,7 +563,7 @@ def extract_intent_and_select_metrics(state: LocalityState) -> LocalityState:
     """
     Extract user intent and select relevant metrics.
     
-    This can run in parallel with geocoding/OSM fetch since it doesn't need coordinates.
+    Runs in parallel with locate_and_fetch since it doesn't need coordinates.
     
     Args:
         state: Current workflow state
@@ -437,30 +577,34 @@ def extract_intent_and_select_metrics(state: LocalityState) -> LocalityState:
     # Handle case where no profile is provided
     if not user_profile or not user_profile.strip():
         from src.analysis.metrics_catalog import get_default_metrics_for_profile
-        state["user_intent"] = {
-            "profile_type": "general",
-            "priorities": [],
-            "concerns": [],
-            "lifestyle": "general"
+        return {
+            "user_intent": {
+                "profile_type": "general",
+                "priorities": [],
+                "concerns": [],
+                "lifestyle": "general"
+            },
+            "selected_metrics": get_default_metrics_for_profile("Custom"),
+            "processing_steps": ["extract_intent_and_select_metrics: SKIPPED - No profile, used defaults"]
         }
-        state["selected_metrics"] = get_default_metrics_for_profile("Custom")
-        state["processing_steps"].append("extract_intent_and_select_metrics: SKIPPED - No profile, used defaults")
-        return state
 
     try:
         from src.llm.intent_extractor import extract_intent_and_select_metrics as llm_extract_and_select
 
         result = llm_extract_and_select(user_profile, user_input)
-        state["user_intent"] = result["user_intent"]
-        state["selected_metrics"] = result["selected_metrics"]
+        user_intent = result["user_intent"]
         
         # Store reasoning for summary generation
         if "reasoning" in result:
-            state["user_intent"]["metric_selection_reasoning"] = result["reasoning"]
+            user_intent["metric_selection_reasoning"] = result["reasoning"]
         
-        state["processing_steps"].append(
-            f"extract_intent_and_select_metrics: SUCCESS - Extracted intent, selected {len(result['selected_metrics'])} metrics"
-        )
+        return {
+            "user_intent": user_intent,
+            "selected_metrics": result["selected_metrics"],
+            "processing_steps": [
+                f"extract_intent_and_select_metrics: SUCCESS - Extracted intent, selected {len(result['selected_metrics'])} metrics"
+            ]
+        }
     except Exception as e:
         # Fallback to defaults
         from src.analysis.metrics_catalog import get_default_metrics_for_profile
@@ -479,17 +623,17 @@ def extract_intent_and_select_metrics(state: LocalityState) -> LocalityState:
         else:
             profile_type = "general"
         
-        state["user_intent"] = {
-            "profile_type": profile_type,
-            "priorities": [],
-            "concerns": [],
-            "lifestyle": "general"
+        return {
+            "user_intent": {
+                "profile_type": profile_type,
+                "priorities": [],
+                "concerns": [],
+                "lifestyle": "general"
+            },
+            "selected_metrics": get_default_metrics_for_profile(profile_type),
+            "warnings": [f"Intent/metric selection failed: {str(e)}, used defaults"],
+            "processing_steps": ["extract_intent_and_select_metrics: WARNING - Used defaults (fallback)"]
         }
-        state["selected_metrics"] = get_default_metrics_for_profile(profile_type)
-        state["warnings"].append(f"Intent/metric selection failed: {str(e)}, used defaults")
-        state["processing_steps"].append("extract_intent_and_select_metrics: WARNING - Used defaults (fallback)")
-    
-    return state
 
 
 def clean_and_deduplicate_pois(gdf: gpd.GeoDataFrame, category_name: str = "") -> gpd.GeoDataFrame:
@@ -548,31 +692,70 @@ def clean_and_deduplicate_pois(gdf: gpd.GeoDataFrame, category_name: str = "") -
     return gdf
 
 
+# Metrics calculated when no selection reached calculate_statistics
+DEFAULT_BASIC_METRICS = (
+    "school_count", "hospital_count", "restaurant_count",
+    "park_area_km2", "metro_station_count", "bus_stop_count",
+    "poi_density"
+)
+
+# Count metrics -> (osm_data category, field); static, so built once at import
+COUNT_METRIC_CATEGORIES = {
+    "school_count": ("schools", "count"),
+    "hospital_count": ("hospitals", "count"),
+    "restaurant_count": ("restaurants", "count"),
+    "cafe_count": ("cafes", "count"),
+    "fast_food_count": ("fast_food", "count"),
+    "shopping_count": ("shops", "count"),
+    "bank_atm_count": ("banks", "count"),
+    "pharmacy_count": ("pharmacies", "count"),
+    "gym_fitness_count": ("gyms", "count"),
+    "library_count": ("libraries", "count"),
+    "place_of_worship_count": ("worship", "count"),
+    "nightlife_count": ("nightlife", "count"),
+    "cinema_count": ("cinemas", "count"),
+    "playground_count": ("playgrounds", "count"),
+    "sports_facility_count": ("sports", "count"),
+    "hotel_count": ("hotels", "count"),
+    "community_centre_count": ("community", "count"),
+    "university_count": ("universities", "count"),
+    "kindergarten_count": ("kindergartens", "count"),
+    "childcare_count": ("childcare", "count"),
+    "tuition_centre_count": ("tuition", "count"),
+    "metro_station_count": ("metro_stations", "count"),
+    "bus_stop_count": ("bus_stops", "count"),
+}
+
+
 def calculate_statistics(state: LocalityState) -> LocalityState:
     """
     Calculate statistics from OSM data.
     
     Computes key metrics including POI counts, density, and connectivity indicators.
+    This is the fan-in point: it runs once both intent extraction and the
+    geocode/OSM fetch branch have finished.
     
     Args:
         state: Current workflow state with OSM data
         
     Returns:
-        Updated state with calculated statistics
+        State update with calculated statistics
     """
     osm_data = state.get("osm_data", {})
     coordinates = state.get("coordinates")
     selected_metrics = state.get("selected_metrics")
     
+    # An upstream branch already failed; let routing send us to handle_error
+    if state.get("errors"):
+        return {"processing_steps": ["calculate_statistics: SKIPPED - Upstream errors"]}
+    
     if not osm_data:
-        state["errors"].append("No OSM data available for statistics calculation")
-        state["next_action"] = "error"
-        return state
+        return {"errors": ["No OSM data available for statistics calculation"], "next_action": "error"}
     
     if not coordinates:
-        state["errors"].append("No coordinates available for distance calculations")
-        state["next_action"] = "error"
-        return state
+        return {"errors": ["No coordinates available for distance calculations"], "next_action": "error"}
+    
+    warnings = []
     
     try:
         from src.analysis.metrics_catalog import METRICS_CATALOG, get_required_dependencies
@@ -586,47 +769,16 @@ def calculate_statistics(state: LocalityState) -> LocalityState:
             metrics_to_calculate.extend([d for d in dependencies if d not in metrics_to_calculate])
         else:
             # If no selection, calculate all basic metrics
-            metrics_to_calculate = [
-                "school_count", "hospital_count", "restaurant_count",
-                "park_area_km2", "metro_station_count", "bus_stop_count",
-                "poi_density"
-            ]
+            metrics_to_calculate = list(DEFAULT_BASIC_METRICS)
         
         # ========================================================================
         # CALCULATE ALL METRICS FROM CATALOG
         # ========================================================================
         
-        # Basic count metrics (from OSM data)
-        category_mapping = {
-            "school_count": ("schools", "count"),
-            "hospital_count": ("hospitals", "count"),
-            "restaurant_count": ("restaurants", "count"),
-            "cafe_count": ("cafes", "count"),
-            "fast_food_count": ("fast_food", "count"),
-            "shopping_count": ("shops", "count"),
-            "bank_atm_count": ("banks", "count"),
-            "pharmacy_count": ("pharmacies", "count"),
-            "gym_fitness_count": ("gyms", "count"),
-            "library_count": ("libraries", "count"),
-            "place_of_worship_count": ("worship", "count"),
-            "nightlife_count": ("nightlife", "count"),
-            "cinema_count": ("cinemas", "count"),
-            "playground_count": ("playgrounds", "count"),
-            "sports_facility_count": ("sports", "count"),
-            "hotel_count": ("hotels", "count"),
-            "community_centre_count": ("community", "count"),
-            "university_count": ("universities", "count"),
-            "kindergarten_count": ("kindergartens", "count"),
-            "childcare_count": ("childcare", "count"),
-            "tuition_centre_count": ("tuition", "count"),
-            "metro_station_count": ("metro_stations", "count"),
-            "bus_stop_count": ("bus_stops", "count"),
-        }
-
         # Calculate count metrics
         for metric_key in metrics_to_calculate:
-            if metric_key in category_mapping:
-                category, field = category_mapping[metric_key]
+            if metric_key in COUNT_METRIC_CATEGORIES:
+                category, field = COUNT_METRIC_CATEGORIES[metric_key]
                 value = osm_data.get(category, {}).get(field, 0)
                 statistics[metric_key] = value
         
@@ -668,13 +820,13 @@ def calculate_statistics(state: LocalityState) -> LocalityState:
             # This requires separate OSM query for roads
             # For now, estimate or skip
             statistics["road_density_km_per_km2"] = None  # Placeholder
-            state["warnings"].append("Road density calculation not yet implemented")
+            warnings.append("Road density calculation not yet implemented")
         
         # Main road count (if needed)
         if "main_road_count" in metrics_to_calculate:
             # Requires separate query
             statistics["main_road_count"] = None
-            state["warnings"].append("Main road count calculation not yet implemented")
+            warnings.append("Main road count calculation not yet implemented")
         
         # Composite metrics (depend on other metrics)
         if "walkability_score" in metrics_to_calculate:
@@ -722,17 +874,19 @@ def calculate_statistics(state: LocalityState) -> LocalityState:
                     filtered_statistics[metric_key] = statistics[metric_key]
             statistics = filtered_statistics
         
-        state["statistics"] = statistics
-        state["next_action"] = "generate_summary"
-        state["processing_steps"].append(
-            f"calculate_statistics: SUCCESS - Calculated {len(statistics)} metrics"
-        )
+        return {
+            "statistics": statistics,
+            "next_action": "generate_summary",
+            "warnings": warnings,
+            "processing_steps": [f"calculate_statistics: SUCCESS - Calculated {len(statistics)} metrics"]
+        }
     except Exception as e:
-        state["errors"].append(f"Error calculating statistics: {str(e)}")
-        state["next_action"] = "error"
-        state["processing_steps"].append(f"calculate_statistics: ERROR - {str(e)}")
-    
-    return state
+        return {
+            "errors": [f"Error calculating statistics: {str(e)}"],
+            "next_action": "error",
+            "warnings": warnings,
+            "processing_steps": [f"calculate_statistics: ERROR - {str(e)}"]
+        }
 
 
 def handle_error(state: LocalityState) -> LocalityState:
@@ -749,11 +903,11 @@ def handle_error(state: LocalityState) -> LocalityState:
     if warnings:
         error_message += "\n\nWarnings:\n" + "\n".join(f"- {warning}" for warning in warnings)
     
-    state["summary"] = error_message
-    state["next_action"] = "end"
-    state["processing_steps"].append("handle_error: Error handling completed")
-    
-    return state
+    return {
+        "summary": error_message,
+        "next_action": "end",
+        "processing_steps": ["handle_error: Error handling completed"]
+    }
 
 
 def generate_summary(state: LocalityState) -> LocalityState:
@@ -768,9 +922,7 @@ def generate_summary(state: LocalityState) -> LocalityState:
     user_profile = state.get("user_profile")
 
     if not statistics and not osm_data:
-        state["errors"].append("No data available for summary generation")
-        state["next_action"] = "error"
-        return state
+        return {"errors": ["No data available for summary generation"], "next_action": "error"}
 
     try:
         from src.llm.summary_generator import generate_summary as llm_generate_summary
@@ -785,18 +937,19 @@ def generate_summary(state: LocalityState) -> LocalityState:
             user_profile=user_profile
         )
         
-        state["summary"] = summary
-        state["next_action"] = "end"
-        state["processing_steps"].append("generate_summary: SUCCESS - Summary generated")
-        return state
+        return {
+            "summary": summary,
+            "next_action": "end",
+            "processing_steps": ["generate_summary: SUCCESS - Summary generated"]
+        }
     except Exception as e:
         print(f"⚠️ Error generating summary: {e}")
-        state["warnings"].append(f"Could not generate summary: {str(e)}")
         # Don't fail - provide basic summary
-        state["summary"] = create_fallback_summary(statistics, osm_data, user_intent)
-        state["processing_steps"].append(f"generate_summary: WARNING - Used fallback summary")
-    
-    return state
+        return {
+            "summary": create_fallback_summary(statistics, osm_data, user_intent),
+            "warnings": [f"Could not generate summary: {str(e)}"],
+            "processing_steps": ["generate_summary: WARNING - Used fallback summary"]
+        }
 
 
 def create_fallback_summary(statistics: dict, osm_data: dict, user_intent: dict = None) -> str:
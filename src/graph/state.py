@@ -1,7 +1,8 @@
 """
 State schema for Locality Lens LangGraph workflow.
 """
-from typing import TypedDict, Optional, List, Dict, Any
+import operator
+from typing import TypedDict, Optional, List, Dict, Any, Annotated
 
 
 class LocalityState(TypedDict):
@@ -10,6 +11,13 @@ class LocalityState(TypedDict):
     
     This TypedDict defines all the data that flows through the graph.
     Each node reads from and writes to this state.
+    
+    List fields written by nodes that run in parallel are annotated with an
+    ``operator.add`` reducer, so updates from concurrent branches are merged
+    instead of overwriting each other.
+    
+    The graph is compiled without a checkpointer, so state is passed between
+    nodes as a plain dict and never serialized; keep it a TypedDict.
     """
     # Input fields
     user_input: str  # Location input (address or coordinates)
@@ -34,7 +42,7 @@ class LocalityState(TypedDict):
     visualization_data: Optional[Dict[str, Any]]  # Map data (future)
     
     # Control fields
-    errors: List[str]  # List of errors encountered
-    warnings: List[str]  # List of warnings
+    errors: Annotated[List[str], operator.add]  # List of errors encountered
+    warnings: Annotated[List[str], operator.add]  # List of warnings
     next_action: str  # Next action to take (for routing)
-    processing_steps: List[str]  # Audit trail of processing steps
\ No newline at end of file
+    processing_steps: Annotated[List[str], operator.add]  # Audit trail of processing steps
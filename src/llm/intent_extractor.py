@@ -3,19 +3,21 @@ LLM-based intent extraction
 """
 import json
 import re
+from functools import lru_cache
 from typing import Dict, Any
 from langchain_groq import ChatGroq
-from config.config import GROQ_API_KEY
+from config.config import get_settings
 from src.analysis.metrics_catalog import (
     get_metrics_for_llm_selection,
     validate_metrics,
     get_default_metrics_for_profile
 )
 
+@lru_cache(maxsize=1)
 def get_llm():
-    """Get LLM instance."""
+    """Get LLM instance (shared, so its HTTP connection pool is reused across calls)."""
     return ChatGroq(
-        api_key=GROQ_API_KEY,
+        api_key=get_settings().groq_api_key,
         model_name="llama-3.1-8b-instant",
         temperature=0.6,
         max_tokens=1024
@@ -38,7 +40,7 @@ def extract_intent_and_select_metrics(user_profile: str, user_input: str = "") -
         - selected_metrics: List of metric keys
         - reasoning: Why these metrics were selected
     """
-    if not GROQ_API_KEY:
+    if not get_settings().groq_api_key:
         raise ValueError("GROQ_API_KEY not configured")
     
     # Get metrics catalog (simplified format)
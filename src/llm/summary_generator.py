@@ -1,17 +1,21 @@
 """
 LLM integration for generating locality summaries.
 """
+from functools import lru_cache
+
 from langchain_openai import ChatOpenAI
-from config.config import OPENAI_API_KEY
+from config.config import get_settings
 from .prompts import get_summary_prompt
 
+@lru_cache(maxsize=1)
 def get_llm():
-    """Get LLM instance."""
+    """Get the shared LLM instance (streaming, so the UI can render tokens as they arrive)."""
     return ChatOpenAI(
-        api_key=OPENAI_API_KEY,
+        api_key=get_settings().openai_api_key,
         model_name="gpt-4o",
         temperature=0.6,
-        max_tokens=1024
+        max_tokens=1024,
+        streaming=True
     )
 
 def generate_summary(
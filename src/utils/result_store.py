@@ -0,0 +1,69 @@
+"""
+On-disk store of pre-computed analyses for popular localities.
+
+Results are written by scripts/prebake.py and read by the app on a cache
+miss, so the most common queries skip the graph (and the LLM) entirely.
+"""
+import pickle
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Pre-computed results live next to the OSMnx HTTP cache
+PREBAKED_DIR = Path(__file__).resolve().parents[2] / "cache" / "prebaked"
+
+# Results older than this are ignored (re-run the prebake job weekly)
+PREBAKED_MAX_AGE_S = 7 * 24 * 60 * 60
+
+
+def slugify(location_input: str) -> str:
+    """
+    Turn a location query into a filesystem-safe slug.
+    
+    Args:
+        location_input: Raw location query (address or coordinates)
+        
+    Returns:
+        Lowercase slug, e.g. "indiranagar-bangalore"
+    """
+    return re.sub(r"[^a-z0-9.]+", "-", location_input.strip().lower()).strip("-")
+
+
+def load_prebaked_result(location_input: str, max_age_s: float = PREBAKED_MAX_AGE_S) -> Optional[Dict[str, Any]]:
+    """
+    Load a pre-computed analysis for a location, if a fresh one exists.
+    
+    Args:
+        location_input: Location query as entered by the user
+        max_age_s: Maximum file age in seconds before the result is stale
+        
+    Returns:
+        Final graph state dict, or None on a miss / stale file
+    """
+    path = PREBAKED_DIR / f"{slugify(location_input)}.pkl"
+    try:
+        if time.time() - path.stat().st_mtime > max_age_s:
+            return None
+        with path.open("rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def save_prebaked_result(location_input: str, result: Dict[str, Any]) -> Path:
+    """
+    Save a finished analysis for a location.
+    
+    Args:
+        location_input: Location query the result was computed for
+        result: Final graph state dict
+        
+    Returns:
+        Path of the written file
+    """
+    PREBAKED_DIR.mkdir(parents=True, exist_ok=True)
+    path = PREBAKED_DIR / f"{slugify(location_input)}.pkl"
+    with path.open("wb") as f:
+        pickle.dump(dict(result), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path